@@ -1,5 +1,5 @@
-import numpy as np
 import itertools
+from dataclasses import dataclass
 
 
 Neighbours = dict[str, tuple[str, str]]
@@ -19,73 +19,141 @@ def walk(direction: str, from_node: str, neighbours: Neighbours) -> str:
     return left if direction == "L" else right
 
 
+def is_starting_node(node: str) -> bool:
+    return node[-1] == "A"
+
+
+def is_destination_node(node: str) -> bool:
+    return node[-1] == "Z"
+
+
+def get_starting_nodes(neighbours: Neighbours) -> list[str]:
+    return list(filter(is_starting_node, neighbours.keys()))
+
+
+State = tuple[str, int]
+
+
+def step(state: State, directions: str, neighbours: Neighbours) -> State:
+    """Walks one step from a (node, position in the direction string) state."""
+
+    node, direction_index = state
+    return walk(directions[direction_index], node, neighbours), (direction_index + 1) % len(directions)
+
+
+def find_cycle(node: str, directions: str, neighbours: Neighbours) -> tuple[int, int]:
+    """Finds the length of the tail and the length of the cycle of the walk starting at node with Brent's algorithm."""
+
+    start_state: State = (node, 0)
+    # find the cycle length by letting the hare run ahead, teleporting the tortoise to it at every power of 2
+    power = cycle_length = 1
+    tortoise = start_state
+    hare = step(start_state, directions, neighbours)
+    while tortoise != hare:
+        if power == cycle_length:
+            tortoise = hare
+            power *= 2
+            cycle_length = 0
+        hare = step(hare, directions, neighbours)
+        cycle_length += 1
+    # find the tail length by letting the hare start one cycle ahead, they meet at the start of the cycle
+    tortoise = hare = start_state
+    for _ in range(cycle_length):
+        hare = step(hare, directions, neighbours)
+    tail_length = 0
+    while tortoise != hare:
+        tortoise = step(tortoise, directions, neighbours)
+        hare = step(hare, directions, neighbours)
+        tail_length += 1
+    return tail_length, cycle_length
+
+
 def compute_jump_map(directions: str, neighbours: Neighbours) -> dict[str, str]:
     """Computes the map that maps every node to the node it lands on after walking through the complete direction string."""
 
     jump_map: dict[str, str] = {}
     for from_node in neighbours.keys():
-        current_node = from_node
-        for direction in directions:
-            current_node = walk(direction, current_node, neighbours)
-        jump_map[from_node] = current_node
+        state: State = (from_node, 0)
+        for _ in range(len(directions)):
+            state = step(state, directions, neighbours)
+        jump_map[from_node] = state[0]
     return jump_map
 
 
-def is_starting_node(node: str) -> bool:
-    return node[-1] == "A"
+JumpTables = list[dict[str, str]]
 
 
-def is_destination_node(node: str) -> bool:
-    return node[-1] == "Z"
+def compute_jump_tables(max_n_cycles: int, directions: str, neighbours: Neighbours) -> JumpTables:
+    """Computes the doubling tables for the jump map: jump_tables[i] maps every node to the node it lands on after walking through the complete direction string 2^i times."""
 
+    jump_tables: JumpTables = [compute_jump_map(directions, neighbours)]
+    while 2 ** len(jump_tables) <= max_n_cycles:
+        last_table = jump_tables[-1]
+        jump_tables.append({node: last_table[last_table[node]] for node in last_table.keys()})
+    return jump_tables
 
-def get_starting_nodes(neighbours: Neighbours) -> list[str]:
-    return list(filter(is_starting_node, neighbours.keys()))
+
+def jump_cycles(node: str, n_cycles: int, jump_tables: JumpTables) -> str:
+    """Finds the node we land on after walking through the complete direction string n_cycles times in O(log n_cycles)."""
+
+    assert n_cycles < 2 ** len(jump_tables), "Jump tables are not big enough."
+    level = 0
+    while n_cycles > 0:
+        if n_cycles & 1:
+            node = jump_tables[level][node]
+        n_cycles >>= 1
+        level += 1
+    return node
 
 
-def is_repeated_by_first_n_numbers(numbers: list[int], n: int) -> bool:
-    assert n > 0
-    for i, number in enumerate(numbers):
-        if number != numbers[i % n]:
-            return False
-    return True
+def walk_n_steps(state: State, n_steps: int, directions: str, neighbours: Neighbours, jump_tables: JumpTables) -> State:
+    """Finds the state we land in after n_steps steps from state, walking to the start of the direction string, jumping over complete passes through it and only walking the rest."""
 
+    node, direction_index = state
+    # walk until we are at the start of the direction string again
+    n_steps_to_start = min((len(directions) - direction_index) % len(directions), n_steps)
+    for _ in range(n_steps_to_start):
+        node, direction_index = step((node, direction_index), directions, neighbours)
+    if direction_index != 0:
+        return node, direction_index
+    n_cycles, n_remaining_steps = divmod(n_steps - n_steps_to_start, len(directions))
+    state = (jump_cycles(node, n_cycles, jump_tables), 0)
+    for _ in range(n_remaining_steps):
+        state = step(state, directions, neighbours)
+    return state
 
-def find_length_of_shortest_repeating_sequence(numbers: list[int]) -> int:
-    for length in range(1, len(numbers)):
-        if is_repeated_by_first_n_numbers(numbers, length):
-            return length
-    return len(numbers)
 
+@dataclass
+class GhostPath:
+    cycle_start: int
+    cycle_length: int
+    destination_steps_in_tail: list[int]
+    destination_steps_in_cycle: list[int]
 
-def find_loop_size(node: str, directions: str, neighbours: Neighbours) -> int:
-    """Finds the length of the loop, assuming node is already in a loop."""
+    def is_destination_step(self, n_steps: int) -> bool:
+        if n_steps < self.cycle_start:
+            return n_steps in self.destination_steps_in_tail
+        return self.cycle_start + (n_steps - self.cycle_start) % self.cycle_length in self.destination_steps_in_cycle
 
-    destination_steps = []
-    max_loop_size = len(directions) * len(neighbours)
-    # walk the whole loop at least twice, save the number of steps we found a destination node on
-    for i in range(2 * max_loop_size):
-        direction = directions[i % len(directions)]
-        node = walk(direction, node, neighbours)
-        if is_destination_node(node):
-            destination_steps.append(i + 1)
-    # figure out the distances between destinations
-    distances = [destination_steps[i + 1] - destination_steps[i] for i in range(len(destination_steps) - 1)]
-    # how many destinations do we cross in 1 loop?
-    destination_loop_size = find_length_of_shortest_repeating_sequence(distances)
-    # destination_steps[destination_loop_size] will be the same destination as destination_steps[0], so the difference between steps is the loop size
-    return destination_steps[destination_loop_size] - destination_steps[0]
 
+def analyze_ghost_path(node: str, directions: str, neighbours: Neighbours) -> GhostPath:
+    """Finds the tail, the cycle and the number of steps on which we land on a destination node in them."""
 
-def find_destination_steps_in_loop(node: str, loop_size: int, directions: str, neighbours: Neighbours) -> list[str]:
-    destination_steps = []
-    # walk the whole loop at least twice, save the number of steps we found a destination node on
-    for i in range(loop_size):
-        direction = directions[i % len(directions)]
-        node = walk(direction, node, neighbours)
-        if is_destination_node(node):
-            destination_steps.append(i + 1)
-    return destination_steps
+    tail_length, cycle_length = find_cycle(node, directions, neighbours)
+    # we need to walk at least one step, so the first cycle can start at 1 at the earliest
+    cycle_start = max(tail_length, 1)
+    destination_steps_in_tail = []
+    destination_steps_in_cycle = []
+    state: State = (node, 0)
+    for n_steps in range(1, cycle_start + cycle_length):
+        state = step(state, directions, neighbours)
+        if not is_destination_node(state[0]):
+            continue
+        if n_steps < cycle_start:
+            destination_steps_in_tail.append(n_steps)
+        else:
+            destination_steps_in_cycle.append(n_steps)
+    return GhostPath(cycle_start, cycle_length, destination_steps_in_tail, destination_steps_in_cycle)
 
 
 def gcd(a: int, b: int) -> int:
@@ -111,69 +179,70 @@ def eea(a: int, b: int) -> tuple[int, int]:
     return p_0, q_0
 
 
-def smallest_prime_factor(n: int) -> int:
-    for k in range(2, int(np.sqrt(n)) + 1):
-        if n % k == 0:
-            return k
-    return n
+def merge_congruencies(a_1: int, m_1: int, a_2: int, m_2: int) -> tuple[int, int] | None:
+    """Merges x = a_1 mod m_1 and x = a_2 mod m_2 into x = a mod lcm(m_1, m_2). Returns None if they contradict each other."""
 
+    g = gcd(m_1, m_2)
+    if (a_2 - a_1) % g != 0:
+        return None
+    # x = a_1 + k * m_1 with m_1 * k = a_2 - a_1 mod m_2, m_1 / g is invertible mod m_2 / g
+    p, _ = eea(m_1 // g, m_2 // g)
+    k = (a_2 - a_1) // g * p % (m_2 // g)
+    modulus = m_1 // g * m_2
+    return (a_1 + k * m_1) % modulus, modulus
 
-def factorize(n: int) -> list[int]:
-    factors = []
-    while n > 1:
-        k = smallest_prime_factor(n)
-        factors.append(k)
-        n //= k
-    return factors
 
-
-def make_moduli_prime(offsets: list[int], moduli: list[int]) -> tuple[list[int], list[int]]:
-    """Adapts the list of offsets and ms such that the moduli are prime."""
-
-    module_to_offset: dict[int, int] = {}
-    for a_i, m_i in zip(offsets, moduli):
-        factors = factorize(m_i)
-        for factor in factors:
-            if factor in module_to_offset:
-                assert module_to_offset[factor] == a_i % factor, "No solutions."
-            else:
-                module_to_offset[factor] = a_i % factor
-    # [(m_1, a_1), ..., (m_n, a_n)] -> [m_1, ..., m_n], [a_1, ..., a_n]
-    new_moduli, new_offsets = zip(*module_to_offset.items())
-    return new_offsets, new_moduli
-
-
-def find_solution_of_simultaneous_congruencies(offsets: list[int], moduli: list[int]) -> int:
+def find_solution_of_simultaneous_congruencies(offsets: list[int], moduli: list[int]) -> int | None:
     """Finds a solution for the simultaneous congruencies x = a_i mod m_i, if it exists. Returns None if there is none."""
 
-    offsets, moduli = make_moduli_prime(offsets, moduli)
-    moduli_product = int(np.prod(moduli))
-    n_is = [moduli_product // module for module in moduli]
-    # p_i * m_i + q_i * M_i == 1
-    q_is = [eea(m_i, n_i)[1] for m_i, n_i in zip(moduli, n_is)]
-    e_is = [q_i * n_i for q_i, n_i in zip(q_is, n_is)]
-    x = sum([offset_i * e_i for offset_i, e_i in zip(offsets, e_is)]) % moduli_product
-    for offset, module in zip(offsets, moduli):
-        assert x % module == offset % module, "Something went wrong during chinese remainder theorem."
+    x, modulus = 0, 1
+    for a_i, m_i in zip(offsets, moduli):
+        merged = merge_congruencies(x, modulus, a_i, m_i)
+        if merged is None:
+            return None
+        x, modulus = merged
     return x
 
 
+def lcm(a: int, b: int) -> int:
+    return a // gcd(a, b) * b
+
+
+def find_smallest_solution(possible_offsets: list[list[int]], moduli: list[int], min_x: int) -> int | None:
+    """Finds the smallest x >= min_x such that x = a mod m_i for one of the offsets a in possible_offsets[i]. Returns None if there is none."""
+
+    # merge the congruencies one at a time, only keeping the combinations that are still solvable
+    residues = {0}
+    modulus = 1
+    for offsets, m_i in sorted(zip(possible_offsets, moduli), key=lambda offsets_and_module: len(offsets_and_module[0])):
+        merged_residues = set()
+        for x in residues:
+            for a_i in offsets:
+                merged = merge_congruencies(x, modulus, a_i, m_i)
+                if merged is not None:
+                    merged_residues.add(merged[0])
+        if len(merged_residues) == 0:
+            return None
+        residues = merged_residues
+        modulus = lcm(modulus, m_i)
+    # the solutions are periodic, so lift them until they are at least min_x
+    return min(min_x + (x - min_x) % modulus for x in residues)
+
+
 def compute_path_length(directions: str, neighbours: Neighbours) -> int:
-    nodes = get_starting_nodes(neighbours)
-    # jump into all loops, and check if we reach a destination before
-    max_loop_size = len(directions) * len(neighbours)
-    for i in range(max_loop_size):
-        direction = directions[i % len(directions)]
-        nodes = [walk(direction, node, neighbours) for node in nodes]
-        # i = 0 is one step
-        if all(map(is_destination_node, nodes)):
-            return i + 1
-    # find out how big the individual loops are
-    loop_sizes = [find_loop_size(node, directions, neighbours) for node in nodes]
-    destination_steps_in_loops = [find_destination_steps_in_loop(node, loop_size, directions, neighbours) for node, loop_size in zip(nodes, loop_sizes)]
-    # for all combinations of destination nodes in different loops, solve the system of simultaneous congruencies (that we land on all destinations with the same number of steps)
-    solutions_of_congruencies = [find_solution_of_simultaneous_congruencies(offsets, loop_sizes) for offsets in itertools.product(*destination_steps_in_loops)]
-    return min(solutions_of_congruencies) + max_loop_size
+    ghost_paths = [analyze_ghost_path(node, directions, neighbours) for node in get_starting_nodes(neighbours)]
+    # check if all ghosts reach a destination before one of them is in its cycle
+    for n_steps in sorted(set(itertools.chain.from_iterable(ghost_path.destination_steps_in_tail for ghost_path in ghost_paths))):
+        if all(ghost_path.is_destination_step(n_steps) for ghost_path in ghost_paths):
+            return n_steps
+    # otherwise, all ghosts have to be in their cycles
+    cycle_starts = [ghost_path.cycle_start for ghost_path in ghost_paths]
+    cycle_lengths = [ghost_path.cycle_length for ghost_path in ghost_paths]
+    destination_steps_in_cycles = [ghost_path.destination_steps_in_cycle for ghost_path in ghost_paths]
+    # find the smallest number of steps on which all ghosts land on one of the destinations in their cycles
+    n_steps = find_smallest_solution(destination_steps_in_cycles, cycle_lengths, max(cycle_starts))
+    assert n_steps is not None, "The ghosts never land on destinations at the same time."
+    return n_steps
 
 
 def solution(input_file: str):
@@ -188,6 +257,14 @@ def main():
     assert gcd(2, 7) == 1
     assert gcd(2, 10) == 2
     assert gcd(4, 10) == 2
+    neighbours = {"A": ("B", "A"), "B": ("C", "C"), "C": ("A", "B")}
+    assert find_cycle("A", "LR", neighbours) == (0, 4)
+    jump_tables = compute_jump_tables(100, "LR", neighbours)
+    assert all(walk_n_steps(("A", 0), n_steps, "LR", neighbours, jump_tables) == (node, n_steps % 2) for n_steps, node in enumerate("ABCAABCAABC"))
+    assert walk_n_steps(("B", 1), 7, "LR", neighbours, jump_tables) == walk_n_steps(("A", 0), 8, "LR", neighbours, jump_tables)
+    assert find_solution_of_simultaneous_congruencies([1, 3], [4, 6]) == 9
+    assert find_solution_of_simultaneous_congruencies([2, 3], [4, 6]) is None
+    assert find_smallest_solution([[2, 1], [3, 4]], [4, 6], 11) == 21
     assert solution("test_input_part_2.txt") == 6
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
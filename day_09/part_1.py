@@ -1,28 +1,63 @@
-def read_sequence(line: str) -> list[int]:
-    return list(map(int, line.split()))
+import math
+import numpy as np
+import numpy.typing as npt
 
 
-def produce_difference_sequence(sequence: list[int]) -> list[int]:
-    return [sequence[i + 1] - sequence[i] for i in range(len(sequence) - 1)]
+# sequences of the same length, as int64 if all values fit and as python ints otherwise
+Sequences = npt.NDArray[np.int64] | npt.NDArray[np.object_]
 
 
-def predict_next(sequence: list[int]) -> int:
-    sequences: list[list[int]] = [sequence]
-    while any([value != 0 for value in sequences[-1]]):
-        sequences.append(produce_difference_sequence(sequences[-1]))
-    return sum([sequence[-1] for sequence in sequences])
+def to_array(sequences: list[list[int]]) -> Sequences:
+    int64_info = np.iinfo(np.int64)
+    if all(int64_info.min <= value <= int64_info.max for sequence in sequences for value in sequence):
+        return np.array(sequences, dtype=np.int64)
+    return np.array(sequences, dtype=object)
+
+
+def read_sequences(lines: list[str]) -> list[Sequences]:
+    """Groups the sequences by their length, so every group is a matrix."""
+
+    sequences_by_length: dict[int, list[list[int]]] = {}
+    for line in lines:
+        sequence = list(map(int, line.split()))
+        sequences_by_length.setdefault(len(sequence), []).append(sequence)
+    return [to_array(sequences) for sequences in sequences_by_length.values()]
+
+
+def compute_next_weights(length: int) -> list[int]:
+    """Computes the weights w_i such that the next value of a sequence x of this length is sum(w_i * x_i)."""
+
+    # taking differences until they are all 0 is the same as assuming that the length-th difference is 0
+    return [(-1) ** (length - 1 - i) * math.comb(length, i) for i in range(length)]
+
+
+def predict_next(sequences: Sequences) -> npt.NDArray[np.object_]:
+    weights = compute_next_weights(sequences.shape[1])
+    # |sum(w_i * x_i)| <= sum(|w_i|) * max(|x_i|) = 2^length * max(|x_i|), only fall back to python ints where that could overflow
+    max_int_value = np.iinfo(np.int64).max
+    max_weighted_sum = np.abs(sequences).max(axis=1).astype(object) * 2 ** sequences.shape[1]
+    overflows = max_weighted_sum > max_int_value
+    # long sequences have binomial weights that don't fit into int64 themselves
+    if sequences.dtype == object or max(map(abs, weights)) > max_int_value:
+        overflows[:] = True
+    predictions = np.empty(sequences.shape[0], dtype=object)
+    if (~overflows).any():
+        predictions[~overflows] = sequences[~overflows] @ np.array(weights, dtype=np.int64)
+    if overflows.any():
+        predictions[overflows] = sequences[overflows].astype(object) @ np.array(weights, dtype=object)
+    return predictions
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
-    sequences = list(map(read_sequence, lines))
-    predictions = list(map(predict_next, sequences))
-    return sum(predictions)
+    return sum(int(sum(predict_next(sequences))) for sequences in read_sequences(lines))
 
 
 def main():
     assert solution("test_input.txt") == 114
+    # the binomial weights of long sequences don't fit into int64
+    assert predict_next(to_array([list(range(70))]))[0] == 70
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
 
@@ -0,0 +1,37 @@
+import numpy as np
+import numpy.typing as npt
+
+
+def compute_neighbour_offsets(width: int, connectivity: int) -> list[int]:
+    """Computes how far a step to each neighbour moves the flat index on a grid of the given width."""
+
+    assert connectivity in (4, 8), "Connectivity has to be 4 or 8."
+    offsets = [-width, width, -1, 1]
+    if connectivity == 8:
+        offsets += [-width - 1, -width + 1, width - 1, width + 1]
+    return offsets
+
+
+def flood(is_wall: npt.NDArray[np.bool_], connectivity: int = 4) -> npt.NDArray[np.bool_]:
+    """Floods everything that is not a wall and can be reached from outside the grid."""
+
+    # pad with a ring of open tiles (that's where the water comes from) and a ring of walls (so we never step off the grid)
+    height, width = is_wall.shape
+    blocked = np.full((height + 4, width + 4), True)
+    blocked[1:-1, 1:-1] = False
+    blocked[2:-2, 2:-2] = is_wall
+    offsets = compute_neighbour_offsets(blocked.shape[1], connectivity)
+    # a tile is visited once it is either blocked or flooded
+    visited = bytearray(blocked.tobytes())
+    start = blocked.shape[1] + 1
+    visited[start] = True
+    stack = [start]
+    while len(stack) > 0:
+        index = stack.pop()
+        for offset in offsets:
+            neighbour = index + offset
+            if not visited[neighbour]:
+                visited[neighbour] = True
+                stack.append(neighbour)
+    flooded = np.frombuffer(visited, dtype=np.bool_).reshape(blocked.shape) & ~blocked
+    return flooded[2:-2, 2:-2]
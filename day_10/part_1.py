@@ -19,15 +19,6 @@ CONNECTED_DIRECTIONS = {
 }
 
 
-# change to [y, x]
-WALK = {
-    Direction.North: np.array([-1, 0], dtype=np.int64),
-    Direction.South: np.array([1, 0], dtype=np.int64),
-    Direction.East: np.array([0, 1], dtype=np.int64),
-    Direction.West: np.array([0, -1], dtype=np.int64),
-}
-
-
 OPPOSITE = {
     Direction.North: Direction.South,
     Direction.South: Direction.North,
@@ -36,6 +27,32 @@ OPPOSITE = {
 }
 
 
+# bit i of a pipe mask is set if the pipe connects to DIRECTIONS[i]
+DIRECTIONS = list(Direction)
+DIRECTION_BITS = {direction: 1 << i for i, direction in enumerate(DIRECTIONS)}
+OPPOSITE_INDEX = [DIRECTIONS.index(OPPOSITE[direction]) for direction in DIRECTIONS]
+
+
+def compute_pipe_mask(pipe: str) -> int:
+    return sum(DIRECTION_BITS[direction] for direction in CONNECTED_DIRECTIONS[pipe])
+
+
+def compute_transitions() -> bytes:
+    """Computes the table that maps (pipe mask << 2 | index of the direction we're walking in) to the index of the direction we're walking in after the pipe."""
+
+    transitions = bytearray([255] * 16 * len(DIRECTIONS))
+    for pipe in CONNECTED_DIRECTIONS.keys():
+        mask = compute_pipe_mask(pipe)
+        for direction_index in range(len(DIRECTIONS)):
+            coming_from = OPPOSITE_INDEX[direction_index]
+            if mask & (1 << coming_from):
+                transitions[mask << 2 | direction_index] = (mask & ~(1 << coming_from)).bit_length() - 1
+    return bytes(transitions)
+
+
+TRANSITIONS = compute_transitions()
+
+
 def find_start(lines: list[str]) -> npt.NDArray[np.int64]:
     for y, line in enumerate(lines):
         for x, c in enumerate(line):
@@ -43,32 +60,44 @@ def find_start(lines: list[str]) -> npt.NDArray[np.int64]:
                 return np.array([y, x], dtype=np.int64)
 
 
-def get_possible_start_direction(start_position: npt.NDArray[np.int64], ground: npt.NDArray) -> Direction:
-    for direction in Direction:
-        next_position = start_position + WALK[direction]
-        pipe = ground[*next_position]
-        if pipe not in CONNECTED_DIRECTIONS:
-            continue
-        if OPPOSITE[direction] in CONNECTED_DIRECTIONS[pipe]:
-            return direction
+def compute_flat_offsets(width: int) -> tuple[int, int, int, int]:
+    """Computes how far a step in each of the DIRECTIONS moves the flat index on a grid of the given width."""
+
+    return -width, width, 1, -1
+
+
+def encode_pipes(ground: npt.NDArray) -> npt.NDArray[np.uint8]:
+    """Maps every tile to its pipe mask, padded by a border of empty tiles so that we can't walk off the grid."""
+
+    masks = np.zeros((ground.shape[0] + 2, ground.shape[1] + 2), dtype=np.uint8)
+    for pipe in CONNECTED_DIRECTIONS.keys():
+        masks[1:-1, 1:-1][ground == pipe] = compute_pipe_mask(pipe)
+    return masks
+
+
+def compute_start_mask(masks: npt.NDArray[np.uint8], start_index: int) -> int:
+    """Finds the mask of the start pipe by checking which neighbours connect back to it."""
 
+    offsets = compute_flat_offsets(masks.shape[1])
+    start_mask = 0
+    for direction_index, offset in enumerate(offsets):
+        if masks.flat[start_index + offset] & (1 << OPPOSITE_INDEX[direction_index]):
+            start_mask |= 1 << direction_index
+    return start_mask
 
-def next_direction(current_direction: Direction, pipe: str) -> Direction:
-    connected = CONNECTED_DIRECTIONS[pipe]
-    coming_from = OPPOSITE[current_direction]
-    if coming_from == connected[0]:
-        return connected[1]
-    return connected[0]
 
+def compute_length(masks: npt.NDArray[np.uint8], start_index: int) -> int:
+    """Walks the loop on flat indices of the padded pipe masks."""
 
-def compute_length(start_position: npt.NDArray[np.int32], ground: npt.NDArray) -> int:
-    direction = get_possible_start_direction(start_position, ground)
-    position = start_position + WALK[direction]
+    offsets = compute_flat_offsets(masks.shape[1])
+    flat_masks = masks.tobytes()
+    transitions = TRANSITIONS
+    direction_index = (flat_masks[start_index] & -flat_masks[start_index]).bit_length() - 1
+    index = start_index + offsets[direction_index]
     n_steps = 1
-    while not np.all(position == start_position):
-        pipe = ground[*position]
-        direction = next_direction(direction, pipe)
-        position += WALK[direction]
+    while index != start_index:
+        direction_index = transitions[flat_masks[index] << 2 | direction_index]
+        index += offsets[direction_index]
         n_steps += 1
     return n_steps
 
@@ -76,15 +105,18 @@ def compute_length(start_position: npt.NDArray[np.int32], ground: npt.NDArray) -
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
-    ground = np.array([[c for c in line] for line in lines])
-    start_position = find_start(ground)
-    total_length = compute_length(start_position, ground)
+    ground = np.array(lines).view("<U1").reshape(len(lines), -1)
+    start_y, start_x = find_start(ground)
+    masks = encode_pipes(ground)
+    start_index = int(np.ravel_multi_index((start_y + 1, start_x + 1), masks.shape))
+    masks.flat[start_index] = compute_start_mask(masks, start_index)
+    total_length = compute_length(masks, start_index)
     return total_length // 2
 
 
 def main():
     assert solution("test_input_1_part_1.txt") == 4
-    assert solution("test_input_2_part_1.txt") == 10
+    assert solution("test_input_2_part_1.txt") == 8
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
 
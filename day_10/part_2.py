@@ -1,12 +1,17 @@
 import numpy as np
 import numpy.typing as npt
 from enum import Enum, auto
-import itertools
+from flood_fill import flood
 
 np.set_printoptions(threshold=np.inf)
 np.set_printoptions(linewidth=np.inf)
 
 
+class AreaMethod(Enum):
+    Flooding = auto()
+    Shoelace = auto()
+
+
 class Direction(Enum):
     North = auto()
     South = auto()
@@ -49,6 +54,32 @@ OPPOSITE = {
 }
 
 
+# bit i of a pipe mask is set if the pipe connects to DIRECTIONS[i]
+DIRECTIONS = list(Direction)
+DIRECTION_BITS = {direction: 1 << i for i, direction in enumerate(DIRECTIONS)}
+OPPOSITE_INDEX = [DIRECTIONS.index(OPPOSITE[direction]) for direction in DIRECTIONS]
+
+
+def compute_pipe_mask(pipe: str) -> int:
+    return sum(DIRECTION_BITS[direction] for direction in CONNECTED_DIRECTIONS[pipe])
+
+
+def compute_transitions() -> bytes:
+    """Computes the table that maps (pipe mask << 2 | index of the direction we're walking in) to the index of the direction we're walking in after the pipe."""
+
+    transitions = bytearray([255] * 16 * len(DIRECTIONS))
+    for pipe in CONNECTED_DIRECTIONS.keys():
+        mask = compute_pipe_mask(pipe)
+        for direction_index in range(len(DIRECTIONS)):
+            coming_from = OPPOSITE_INDEX[direction_index]
+            if mask & (1 << coming_from):
+                transitions[mask << 2 | direction_index] = (mask & ~(1 << coming_from)).bit_length() - 1
+    return bytes(transitions)
+
+
+TRANSITIONS = compute_transitions()
+
+
 def find_start(lines: list[str]) -> npt.NDArray[np.int64]:
     for y, line in enumerate(lines):
         for x, c in enumerate(line):
@@ -70,28 +101,46 @@ def get_start_pipe(start_position: npt.NDArray[np.int64], ground: npt.NDArray) -
     return PIPES[tuple(connected_directions)]
 
 
-def next_direction(current_direction: Direction, pipe: str) -> Direction:
-    connected = CONNECTED_DIRECTIONS[pipe]
-    coming_from = OPPOSITE[current_direction]
-    if coming_from == connected[0]:
-        return connected[1]
-    return connected[0]
+def compute_flat_offsets(width: int) -> tuple[int, int, int, int]:
+    """Computes how far a step in each of the DIRECTIONS moves the flat index on a grid of the given width."""
+
+    return -width, width, 1, -1
+
+
+def encode_pipes(ground: npt.NDArray) -> npt.NDArray[np.uint8]:
+    """Maps every tile to its pipe mask, padded by a border of empty tiles so that we can't walk off the grid."""
+
+    masks = np.zeros((ground.shape[0] + 2, ground.shape[1] + 2), dtype=np.uint8)
+    for pipe in CONNECTED_DIRECTIONS.keys():
+        masks[1:-1, 1:-1][ground == pipe] = compute_pipe_mask(pipe)
+    return masks
+
+
+def trace_loop(masks: npt.NDArray[np.uint8], start_index: int) -> list[int]:
+    """Walks the loop on flat indices of the padded pipe masks and returns the flat indices of all loop tiles."""
+
+    offsets = compute_flat_offsets(masks.shape[1])
+    flat_masks = masks.tobytes()
+    transitions = TRANSITIONS
+    direction_index = (flat_masks[start_index] & -flat_masks[start_index]).bit_length() - 1
+    index = start_index + offsets[direction_index]
+    loop = [index]
+    while index != start_index:
+        direction_index = transitions[flat_masks[index] << 2 | direction_index]
+        index += offsets[direction_index]
+        loop.append(index)
+    return loop
 
 
 def compute_loop_tiles(start_position: npt.NDArray[np.int64], ground: npt.NDArray) -> npt.NDArray[np.bool8]:
     """Assumes that start pipe has already been replaced."""
-    
+
     assert ground[*start_position] != "S"
-    is_loop_tile = np.full(ground.shape, False)
-    direction = CONNECTED_DIRECTIONS[ground[*start_position]][0]
-    position = start_position + WALK[direction]
-    is_loop_tile[*position] = True
-    while not np.all(position == start_position):
-        pipe = ground[*position]
-        direction = next_direction(direction, pipe)
-        position += WALK[direction]
-        is_loop_tile[*position] = True
-    return is_loop_tile
+    masks = encode_pipes(ground)
+    start_index = int(np.ravel_multi_index(tuple(start_position + 1), masks.shape))
+    is_loop_tile = np.full(masks.size, False)
+    is_loop_tile[trace_loop(masks, start_index)] = True
+    return is_loop_tile.reshape(masks.shape)[1:-1, 1:-1]
 
 
 def zoom_on_pipe(pipe: str) -> npt.NDArray[np.bool8]:
@@ -118,58 +167,48 @@ def visualize(arr: npt.NDArray[np.bool8]) -> str:
     return "\n".join(["".join(line) for line in visualization])
 
 
-def find_propagations(is_wall: npt.NDArray[np.bool8], flooded: npt.NDArray[np.bool8], last_propagations: list[tuple[int, int]]) -> set[tuple[int, int]]:
-    propagations = set()
-    for y, x in last_propagations:
-        if not flooded[y, x]:
-            continue
-        for offset_y, offset_x in itertools.product([-1, 1], [-1, 1]):
-            if not 0 <= y + offset_y < flooded.shape[0] or not 0 <= x + offset_x < flooded.shape[1]:
-                continue
-            if not is_wall[y + offset_y, x + offset_x] and not flooded[y + offset_y, x + offset_x]:
-                propagations.add((y + offset_y, x + offset_x))
-    return propagations
-
-
-def flood(is_wall: npt.NDArray[np.bool8]) -> npt.NDArray[np.bool8]:
-    flooded = np.full(is_wall.shape, False)
-    flooded[0, :] = True
-    flooded[-1, :] = True
-    flooded[:, 0] = True
-    flooded[:, -1] = True
-    propagations = np.transpose(np.nonzero(flooded))
-    while len(propagations) > 0:
-        propagation_arr = np.full(flooded.shape, False)
-        for y, x in propagations:
-            flooded[y, x] = True
-            propagation_arr[y, x] = True
-        propagations = find_propagations(is_wall, flooded, propagations)
-    return flooded
-
-
-def compute_enclosed_area(ground: npt.NDArray, start_position: npt.NDArray[np.int64]) -> int:
+def compute_enclosed_area_by_flooding(ground: npt.NDArray, start_position: npt.NDArray[np.int64]) -> int:
     assert ground[*start_position] != "S"
     is_loop_tile = compute_loop_tiles(start_position, ground)
     zoomed_in = zoom_in(ground, is_loop_tile)
-    flooded = flood(zoomed_in)
+    flooded = flood(zoomed_in, connectivity=8)
     is_flooded_tile = flooded[1::3,1::3]
     is_enclosed_tile = ~(is_loop_tile | is_flooded_tile)
     return np.count_nonzero(is_enclosed_tile)
 
 
-def solution(input_file: str):
+def compute_enclosed_area_by_shoelace(ground: npt.NDArray, start_position: npt.NDArray[np.int64]) -> int:
+    """Computes the area of the polygon through the loop tiles with the shoelace formula and counts the tiles inside with Pick's theorem."""
+
+    assert ground[*start_position] != "S"
+    masks = encode_pipes(ground)
+    start_index = int(np.ravel_multi_index(tuple(start_position + 1), masks.shape))
+    ys, xs = np.divmod(np.array(trace_loop(masks, start_index), dtype=np.int64), masks.shape[1])
+    twice_area = abs(np.dot(xs, np.roll(ys, -1)) - np.dot(ys, np.roll(xs, -1)))
+    # A = I + B / 2 - 1, where the B boundary points are the loop tiles
+    return int(twice_area - len(xs)) // 2 + 1
+
+
+def compute_enclosed_area(ground: npt.NDArray, start_position: npt.NDArray[np.int64], method: AreaMethod) -> int:
+    if method == AreaMethod.Flooding:
+        return compute_enclosed_area_by_flooding(ground, start_position)
+    return compute_enclosed_area_by_shoelace(ground, start_position)
+
+
+def solution(input_file: str, method: AreaMethod = AreaMethod.Shoelace):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
-    ground = np.array([[c for c in line] for line in lines])
+    ground = np.array(lines).view("<U1").reshape(len(lines), -1)
     start_position = find_start(ground)
     ground[*start_position] = get_start_pipe(start_position, ground)
-    return compute_enclosed_area(ground, start_position)
+    return compute_enclosed_area(ground, start_position, method)
 
 
 def main():
-    # assert solution("test_input_1_part_2.txt") == 4
-    assert solution("test_input_2_part_2.txt") == 4
-    assert solution("test_input_3_part_2.txt") == 8
+    for method in AreaMethod:
+        assert solution("test_input_1_part_2.txt", method) == 4
+        assert solution("test_input_2_part_2.txt", method) == 4
+        assert solution("test_input_3_part_2.txt", method) == 8
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
 
@@ -2,35 +2,44 @@ import numpy as np
 import numpy.typing as npt
 
 
-def find_empty_rows(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.int64]:
-    return np.array([y for y in range(is_galaxy.shape[0]) if np.all(is_galaxy[y, :] == False)])
+def find_empty_rows(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.bool8]:
+    return ~np.any(is_galaxy, axis=1)
 
 
-def find_empty_columns(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.int64]:
-    return np.array([x for x in range(is_galaxy.shape[1]) if np.all(is_galaxy[:, x] == False)])
+def find_empty_columns(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.bool8]:
+    return ~np.any(is_galaxy, axis=0)
 
 
 def parse_galaxies(lines: list[str]) -> npt.NDArray[np.bool8]:
     return np.array([[c == "#" for c in line] for line in lines])
 
 
-def distance(galaxy_coords_1: npt.NDArray[np.int64], galaxy_coords_2: npt.NDArray[np.int64], empty_rows: npt.NDArray[np.int64], empty_columns: npt.NDArray[np.int64]) -> int:
-    min_x, max_x = min(galaxy_coords_1[1], galaxy_coords_2[1]), max(galaxy_coords_1[1], galaxy_coords_2[1])
-    min_y, max_y = min(galaxy_coords_1[0], galaxy_coords_2[0]), max(galaxy_coords_1[0], galaxy_coords_2[0])
-    empty_columns_between = np.count_nonzero((empty_columns > min_x) & (empty_columns < max_x))
-    empty_rows_between = np.count_nonzero((empty_rows > min_y) & (empty_rows < max_y))
-    return (max_x - min_x) + (max_y - min_y) + empty_columns_between + empty_rows_between
+def expand_coordinates(coords: npt.NDArray[np.int64], is_empty_line: npt.NDArray[np.bool8], expansion_factor: int) -> npt.NDArray[np.int64]:
+    """Maps coordinates along one axis to where they end up after every empty line is replaced by expansion_factor empty lines."""
+
+    n_empty_lines_before = np.cumsum(is_empty_line, dtype=np.int64)[coords]
+    return coords + (expansion_factor - 1) * n_empty_lines_before
+
+
+def sum_of_pairwise_distances(coords: npt.NDArray[np.int64]) -> int:
+    """Computes the sum of |x_i - x_j| over all pairs i < j in O(n log n)."""
+
+    # after sorting, x_i is added for the i smaller coordinates before it and subtracted for the n - 1 - i bigger ones after it
+    sorted_coords = np.sort(coords)
+    n = len(sorted_coords)
+    weights = 2 * np.arange(n, dtype=np.int64) - (n - 1)
+    return int(np.dot(sorted_coords, weights))
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
     is_galaxy = parse_galaxies(lines)
-    galaxy_coords = np.transpose(np.nonzero(is_galaxy))
-    empty_rows = find_empty_rows(is_galaxy)
-    empty_columns = find_empty_columns(is_galaxy)
-    n_galaxies = len(galaxy_coords)
-    return sum([distance(galaxy_coords[i], galaxy_coords[j], empty_rows, empty_columns) for i in range(n_galaxies) for j in range(i + 1, n_galaxies)])
+    ys, xs = np.nonzero(is_galaxy)
+    # manhattan distances are separable, so the axes can be summed up independently
+    expanded_ys = expand_coordinates(ys, find_empty_rows(is_galaxy), 2)
+    expanded_xs = expand_coordinates(xs, find_empty_columns(is_galaxy), 2)
+    return sum_of_pairwise_distances(expanded_ys) + sum_of_pairwise_distances(expanded_xs)
 
 
 def main():
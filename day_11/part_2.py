@@ -1,48 +1,70 @@
 import numpy as np
 import numpy.typing as npt
+from dataclasses import dataclass
 
 
 EXPANSION_FACTOR = 1000000
 
 
-def find_empty_rows(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.int64]:
-    return np.array([y for y in range(is_galaxy.shape[0]) if np.all(is_galaxy[y, :] == False)])
+def find_empty_rows(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.bool8]:
+    return ~np.any(is_galaxy, axis=1)
 
 
-def find_empty_columns(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.int64]:
-    return np.array([x for x in range(is_galaxy.shape[1]) if np.all(is_galaxy[:, x] == False)])
+def find_empty_columns(is_galaxy: npt.NDArray[np.bool8]) -> npt.NDArray[np.bool8]:
+    return ~np.any(is_galaxy, axis=0)
 
 
 def parse_galaxies(lines: list[str]) -> npt.NDArray[np.bool8]:
     return np.array([[c == "#" for c in line] for line in lines])
 
 
-def distance(galaxy_coords_1: npt.NDArray[np.int64], galaxy_coords_2: npt.NDArray[np.int64], empty_rows: npt.NDArray[np.int64], empty_columns: npt.NDArray[np.int64]) -> int:
-    min_x, max_x = min(galaxy_coords_1[1], galaxy_coords_2[1]), max(galaxy_coords_1[1], galaxy_coords_2[1])
-    min_y, max_y = min(galaxy_coords_1[0], galaxy_coords_2[0]), max(galaxy_coords_1[0], galaxy_coords_2[0])
-    empty_columns_between = np.count_nonzero((empty_columns > min_x) & (empty_columns < max_x))
-    empty_rows_between = np.count_nonzero((empty_rows > min_y) & (empty_rows < max_y))
-    return (max_x - min_x) + (max_y - min_y) + (EXPANSION_FACTOR - 1) * (empty_columns_between + empty_rows_between)
+def count_empty_lines_before(coords: npt.NDArray[np.int64], is_empty_line: npt.NDArray[np.bool8]) -> npt.NDArray[np.int64]:
+    return np.cumsum(is_empty_line, dtype=np.int64)[coords]
 
 
-def solution(input_file: str):
+def sum_of_pairwise_distances(coords: npt.NDArray[np.int64]) -> int:
+    """Computes the sum of |x_i - x_j| over all pairs i < j in O(n log n)."""
+
+    # after sorting, x_i is added for the i smaller coordinates before it and subtracted for the n - 1 - i bigger ones after it
+    sorted_coords = np.sort(coords)
+    n = len(sorted_coords)
+    weights = 2 * np.arange(n, dtype=np.int64) - (n - 1)
+    return int(np.dot(sorted_coords, weights))
+
+
+@dataclass
+class DistanceSums:
+    base: int
+    n_empty_lines_crossed: int
+
+    def expand(self, expansion_factor: int) -> int:
+        return self.base + (expansion_factor - 1) * self.n_empty_lines_crossed
+
+
+def compute_distance_sums(is_galaxy: npt.NDArray[np.bool8]) -> DistanceSums:
+    """Computes the sum of distances between all pairs of galaxies before expansion and the number of empty lines these paths cross."""
+
+    ys, xs = np.nonzero(is_galaxy)
+    # manhattan distances are separable, so the axes can be summed up independently
+    base = sum_of_pairwise_distances(ys) + sum_of_pairwise_distances(xs)
+    # the number of empty lines before a coordinate grows with the coordinate, so differences in it count the empty lines in between
+    empty_rows_before = count_empty_lines_before(ys, find_empty_rows(is_galaxy))
+    empty_columns_before = count_empty_lines_before(xs, find_empty_columns(is_galaxy))
+    n_empty_lines_crossed = sum_of_pairwise_distances(empty_rows_before) + sum_of_pairwise_distances(empty_columns_before)
+    return DistanceSums(base, n_empty_lines_crossed)
+
+
+def solution(input_file: str, expansion_factors: list[int]) -> list[int]:
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
     is_galaxy = parse_galaxies(lines)
-    galaxy_coords = np.transpose(np.nonzero(is_galaxy))
-    empty_rows = find_empty_rows(is_galaxy)
-    empty_columns = find_empty_columns(is_galaxy)
-    n_galaxies = len(galaxy_coords)
-    return sum([distance(galaxy_coords[i], galaxy_coords[j], empty_rows, empty_columns) for i in range(n_galaxies) for j in range(i + 1, n_galaxies)])
+    distance_sums = compute_distance_sums(is_galaxy)
+    return [distance_sums.expand(expansion_factor) for expansion_factor in expansion_factors]
 
 
 def main():
-    global EXPANSION_FACTOR
-    original_expansion_factor = EXPANSION_FACTOR
-    EXPANSION_FACTOR = 10
-    assert solution("test_input.txt") == 1030
-    EXPANSION_FACTOR = original_expansion_factor
-    answer = solution("input.txt")
+    assert solution("test_input.txt", [2, 10, 100]) == [374, 1030, 8410]
+    answer = solution("input.txt", [EXPANSION_FACTOR])[0]
     print(f"<flavor text>: {answer}")
 
 
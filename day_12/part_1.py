@@ -1,51 +1,47 @@
 import itertools
 
 
-def parse_line(line: str) -> tuple[list[str], list[int]]:
-    line, check = line.split()
-    return list(line), list(map(int, check.split(",")))
-
-
-def find_unknown(line: str) -> list[int]:
-    return [i for i, spring in enumerate(line) if spring == "?"]
-
-
-def compute_check(spring_line: list[str]) -> list[int]:
-    check = []
-    contiguous = 0
-    for spring in spring_line:
-        if spring == "#":
-            contiguous += 1
-        else:
-            if contiguous > 0:
-                check.append(contiguous)
-            contiguous = 0
-    if contiguous > 0:
-        check.append(contiguous)
-    return check
-
-
-def substitute(springs: list[str], unknown_indices: list[int], assignments: list[str]) -> list[str]:
-    for assignment_index, line_index in enumerate(unknown_indices):
-        springs[line_index] = assignments[assignment_index]
-    return springs
-
-
-def compute_possible_arrangements(spring_line: list[str], check: list[int]) -> int:
-    n_possible_arrangements = 0
-    unknown_indices = find_unknown(spring_line)
-    for assignments in itertools.product(["#", "."], repeat=len(unknown_indices)):
-        substitute(spring_line, unknown_indices, assignments)
-        if compute_check(spring_line) == check:
-            n_possible_arrangements += 1
-    return n_possible_arrangements
+def parse_line(line: str) -> tuple[str, list[int]]:
+    line, sequence = line.split()
+    return line, list(map(int, sequence.split(",")))
+
+
+def count_springs_before(spring_line: str, spring: str) -> list[int]:
+    """n_springs_before[i] is the number of occurences of spring in spring_line[:i]."""
+
+    return [0] + list(itertools.accumulate(int(c == spring) for c in spring_line))
+
+
+def compute_possible_arrangements(spring_line: str, sequences: list[int]) -> int:
+    """Counts the arrangements with a DP over (position, sequence), where n_arrangements[p] is the number of arrangements of the remaining sequences in spring_line[p:]."""
+
+    length = len(spring_line)
+    n_working_before = count_springs_before(spring_line, ".")
+    n_broken_before = count_springs_before(spring_line, "#")
+    # without any sequences left, there can't be any broken springs left
+    n_arrangements = [int(n_broken_before[length] == n_broken_before[position]) for position in range(length + 1)]
+    for sequence_length in reversed(sequences):
+        n_arrangements_with_sequence = [0] * (length + 1)
+        for position in reversed(range(length)):
+            # either the sequence starts later (only possible if this spring is not broken), or
+            if spring_line[position] != "#":
+                n_arrangements_with_sequence[position] = n_arrangements_with_sequence[position + 1]
+            # it starts right here, if there are no working springs in it and no broken spring right after it
+            end = position + sequence_length
+            if end > length or n_working_before[end] != n_working_before[position]:
+                continue
+            if end < length and spring_line[end] == "#":
+                continue
+            n_arrangements_with_sequence[position] += n_arrangements[min(end + 1, length)]
+        n_arrangements = n_arrangements_with_sequence
+    return n_arrangements[0]
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
-    spring_lines, checks = zip(*map(parse_line, lines))
-    return sum([compute_possible_arrangements(spring_line, check) for spring_line, check in zip(spring_lines, checks)])
+    spring_lines, sequences = zip(*map(parse_line, lines))
+    return sum([compute_possible_arrangements(spring_line, sequence) for spring_line, sequence in zip(spring_lines, sequences)])
 
 
 def main():
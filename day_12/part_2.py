@@ -1,7 +1,9 @@
-import numpy as np
-import numpy.typing as npt
+import itertools
+from collections import defaultdict
 
 UNFOLDING_FACTOR = 5
+# how many steps of the plain DP one transition of the block engine is worth
+TRANSITION_COST = 3
 
 
 def parse_line(line: str) -> tuple[str, list[int]]:
@@ -9,106 +11,197 @@ def parse_line(line: str) -> tuple[str, list[int]]:
     return line, list(map(int, sequence.split(",")))
 
 
-def unfold_spring_line(spring_line: str) -> str:
-    return "?".join([spring_line] * UNFOLDING_FACTOR)
+def unfold_spring_line(spring_line: str, unfolding_factor: int) -> str:
+    return "?".join([spring_line] * unfolding_factor)
 
 
-def unfold_sequences(sequence: list[int]) -> list[int]:
-    return sequence * UNFOLDING_FACTOR
+def unfold_sequences(sequence: list[int], unfolding_factor: int) -> list[int]:
+    return sequence * unfolding_factor
 
 
-def is_possible_last_placement(sequence_length: int, spring_line: str, placement: int, cutoff: int) -> bool:
-    """Returns if it is possible to place n contiguous '#' at the given position, such that it is the last occurence of '#' before the cutoff."""
+def count_springs_before(spring_line: str, spring: str) -> list[int]:
+    """n_springs_before[i] is the number of occurences of spring in spring_line[:i]."""
 
-    # a placement of (exactly) n contiguous broken springs is possible if:
-    # - the placement starts at the start or the left of the placement is a working or unknown spring, and
-    # - the placement ends at the end or the right of the placement is a working or unknown spring, and
-    # - spring_line[placement : placement + n] is filled with only broken and unknown springs
-    if placement > 0 and spring_line[placement - 1] == "#":
-        return False
-    if placement + sequence_length < len(spring_line) and spring_line[placement + sequence_length] == "#":
-        return False
-    for spring in spring_line[placement: placement + sequence_length]:
-        if spring == ".":
-            return False
-    # if it should be the last placement (no other contiguous broken springs should exist after this one), then there can't be any broken spring between the end of this placement and the cutoff
-    for spring in spring_line[placement + sequence_length: cutoff]:
-        if spring == "#":
-            return False
-    return True
-
-
-def is_possible_only_placement(sequence_length: int, spring_line: str, placement: int, cut_off: int) -> bool:
-    """Returns if it is possible to place n contiguous '#' at the given position, such that it is the only occurence of '#' before the cutoff."""
-
-    if not is_possible_last_placement(sequence_length, spring_line, placement, cut_off):
-        return False
-    for spring in spring_line[:placement]:
-        if spring == "#":
-            return False
-    return True
-
-
-def compute_possible_as_last_placements(sequence_length: int, spring_line: str) -> npt.NDArray[np.bool8]:
-    """possible_last_placements[position][cut_off] == is_possible_last_placement(n_contiguous_broken, spring_line, placement, cut_off)"""
-
-    n_possible_positions = len(spring_line) - sequence_length + 1
-    n_cutoffs = len(spring_line) + 2
-    return np.array([[is_possible_last_placement(sequence_length, spring_line, placement, cut_off) for cut_off in range(n_cutoffs)] for placement in range(n_possible_positions)], dtype=bool)
-
-
-def compute_possible_as_only_placements(sequence_length: int, spring_line: str) -> npt.NDArray[np.bool8]:
-    """possible_only_placements[position][cut_off] == is_possible_only_placement(n_contiguous_broken, spring_line, placement, cut_off)"""
-
-    n_possible_positions = len(spring_line) - sequence_length + 1
-    n_cutoffs = len(spring_line) + 2
-    return np.array([[is_possible_only_placement(sequence_length, spring_line, placement, cutoff) for cutoff in range(n_cutoffs)] for placement in range(n_possible_positions)], dtype=bool)
-
-
-def compute_next_n_possible_arrangements(sequence_length: int, possible_placements: npt.NDArray[np.bool8], n_arrangements: npt.NDArray[np.int64]) -> list[int]:
-    """For the sequence k, the k-th n_arrangements[i] = # of arrangements of the remaining sequences after k (k + 1, ..., n), given sequence k is positioned at i.
-    With this, (k-1)-th n_arrangements[i] is the sum of all k-th n_arrangements[j] where i is possible as a last position for the sequence k-1 before j."""
-
-    n_possible_placements = possible_placements.shape[0]
-    n_arrangements_next = np.empty(n_possible_placements, dtype=np.int64)
-    length_arrangements = n_arrangements.shape[0]
-    for placement in range(n_possible_placements):
-        # the number of possibilities to place the next one after the current one (there needs to be a free space between the two contiguous sequences)
-        first_position_after_sequence = placement + sequence_length + 1
-        n_arrangements_next[placement] = possible_placements[placement, first_position_after_sequence:length_arrangements] @ n_arrangements[first_position_after_sequence:]
-    return n_arrangements_next
+    return [0] + list(itertools.accumulate(int(c == spring) for c in spring_line))
 
 
 def compute_possible_arrangements(spring_line: str, sequences: list[int]) -> int:
-    # pre-process the possible placements for the first sequence, and
-    possible_first_placements = compute_possible_as_only_placements(sequences[0], spring_line)
-    # if there's only one sequence, we got an easy job
-    if len(sequences) == 1:
-        return np.count_nonzero(possible_first_placements[:, -1])
-    # pre-process the possible placements for all the other occuring lengths of sequences
-    occuring_sequence_lengths = set(sequences)
-    possible_placements_for_sequence = {sequence_length: compute_possible_as_last_placements(sequence_length, spring_line) for sequence_length in occuring_sequence_lengths}
-    # start building the first number of arrangements (if we only had the last n_contiguous)
-    sequence_length = sequences[-1]
-    n_possible_arrangements = possible_placements_for_sequence[sequence_length][:, -1].astype(np.int64)
-    # the next sequence could theoretically start after the line
-    for sequence_length in reversed(sequences[1:-1]):
-        n_possible_arrangements = compute_next_n_possible_arrangements(sequence_length, possible_placements_for_sequence[sequence_length], n_possible_arrangements)
-    # the last one has to be the only sequence
-    n_possible_arrangements = compute_next_n_possible_arrangements(sequences[0], possible_first_placements, n_possible_arrangements)
-    return sum(n_possible_arrangements)
-
-
-def solution(input_file: str):
+    """Counts the arrangements with a DP over (position, sequence), where n_arrangements[p] is the number of arrangements of the remaining sequences in spring_line[p:]."""
+
+    length = len(spring_line)
+    n_working_before = count_springs_before(spring_line, ".")
+    n_broken_before = count_springs_before(spring_line, "#")
+    # without any sequences left, there can't be any broken springs left
+    n_arrangements = [int(n_broken_before[length] == n_broken_before[position]) for position in range(length + 1)]
+    for sequence_length in reversed(sequences):
+        n_arrangements_with_sequence = [0] * (length + 1)
+        for position in reversed(range(length)):
+            # either the sequence starts later (only possible if this spring is not broken), or
+            if spring_line[position] != "#":
+                n_arrangements_with_sequence[position] = n_arrangements_with_sequence[position + 1]
+            # it starts right here, if there are no working springs in it and no broken spring right after it
+            end = position + sequence_length
+            if end > length or n_working_before[end] != n_working_before[position]:
+                continue
+            if end < length and spring_line[end] == "#":
+                continue
+            n_arrangements_with_sequence[position] += n_arrangements[min(end + 1, length)]
+        n_arrangements = n_arrangements_with_sequence
+    return n_arrangements[0]
+
+
+# (lag, number of broken springs in the current sequence so far), where the lag is the number of completed sequences minus len(sequences) per processed block
+BoundaryState = tuple[int, int]
+# (index of the current sequence mod the number of sequences, number of broken springs in it so far) before a block -> (number of sequences completed in the block, number of broken springs after it) -> number of ways
+Transfer = dict[BoundaryState, dict[BoundaryState, int]]
+# boundary state -> boundary state -> number of ways
+Matrix = dict[BoundaryState, dict[BoundaryState, int]]
+
+
+def compute_transfer(block: str, sequences: list[int]) -> Transfer:
+    """Computes in how many ways every state before the block can be carried through the block into every state after it."""
+
+    transfer: Transfer = {}
+    for first_sequence in range(len(sequences)):
+        for n_broken in range(sequences[first_sequence] + 1):
+            states: dict[BoundaryState, int] = {(0, n_broken): 1}
+            for spring in block:
+                next_states: dict[BoundaryState, int] = defaultdict(int)
+                for (n_completed, n_broken_so_far), n_ways in states.items():
+                    sequence_length = sequences[(first_sequence + n_completed) % len(sequences)]
+                    # the spring is broken: continue (or start) the current sequence
+                    if spring != "." and n_broken_so_far < sequence_length:
+                        next_states[(n_completed, n_broken_so_far + 1)] += n_ways
+                    # the spring is working: either we're between sequences, or the current sequence has to be complete
+                    if spring != "#" and n_broken_so_far == 0:
+                        next_states[(n_completed, 0)] += n_ways
+                    elif spring != "#" and n_broken_so_far == sequence_length:
+                        next_states[(n_completed + 1, 0)] += n_ways
+                states = next_states
+            transfer[(first_sequence, n_broken)] = dict(states)
+    return transfer
+
+
+def multiply(a: Matrix, b: Matrix) -> Matrix:
+    product: Matrix = {}
+    for state, a_row in a.items():
+        product_row: dict[BoundaryState, int] = defaultdict(int)
+        for middle_state, n_ways in a_row.items():
+            for next_state, n_next_ways in b.get(middle_state, {}).items():
+                product_row[next_state] += n_ways * n_next_ways
+        product[state] = dict(product_row)
+    return product
+
+
+def power(matrix: Matrix, exponent: int) -> Matrix:
+    """Computes matrix^exponent with repeated squaring."""
+
+    result: Matrix = {state: {state: 1} for state in matrix.keys()}
+    while exponent > 0:
+        if exponent & 1:
+            result = multiply(result, matrix)
+        matrix = multiply(matrix, matrix)
+        exponent >>= 1
+    return result
+
+
+def compute_unfolded_arrangements(spring_line: str, sequences: list[int], unfolding_factor: int) -> int:
+    """Counts the arrangements of the unfolded line block by block, where every block after the first is '?' followed by the folded line.
+
+    States are keyed by their lag, so a block maps the same states to the same states as long as the lag stays bounded. Once it does, the remaining blocks are a matrix power.
+    Rows with a lot of slack keep a band of lags that widens with every block, so their cost grows with unfolding_factor^2, just like the plain DP on the unfolded line. Once a block costs more than it would in that DP, we fall back to it.
+    """
+
+    n_sequences = len(sequences) * unfolding_factor
+    block_length = len(spring_line) + 1
+    sequence_length_before = [0] + list(itertools.accumulate(sequences))
+
+    def min_length(n_completed: int, n_broken: int) -> int:
+        """The number of springs the sequences that are not completed yet need at least."""
+
+        if n_completed == n_sequences:
+            return 0
+        n_cycles, first_sequence = divmod(n_completed, len(sequences))
+        sequence_length_left = (unfolding_factor - n_cycles) * sequence_length_before[-1] - sequence_length_before[first_sequence]
+        return sequence_length_left + n_sequences - n_completed - 1 - n_broken
+
+    first_transfer = compute_transfer(spring_line, sequences)
+    transfer = compute_transfer("?" + spring_line, sequences)
+    # only look at the blocks that start in a state that a block can end in
+    reachable = {(n_completed % len(sequences), n_broken) for n_completed, n_broken in first_transfer[(0, 0)].keys()}
+    stack = list(reachable)
+    while len(stack) > 0:
+        first_sequence, n_broken_before = stack.pop()
+        for n_completed, n_broken in transfer[(first_sequence, n_broken_before)].keys():
+            next_state = ((first_sequence + n_completed) % len(sequences), n_broken)
+            if next_state not in reachable:
+                reachable.add(next_state)
+                stack.append(next_state)
+    completed_per_block = [n_completed for state in reachable for n_completed, _ in transfer[state].keys()]
+    max_completed_per_block = max(completed_per_block, default=0)
+    min_completed_per_block = min(completed_per_block, default=0)
+
+    def carry(state: BoundaryState, block_transfer: Transfer, n_blocks_done: int) -> dict[BoundaryState, int]:
+        """Carries a state through the next block, keeping only the states that can still be completed."""
+
+        lag, n_broken = state
+        n_blocks_left = unfolding_factor - n_blocks_done - 1
+        next_states: dict[BoundaryState, int] = {}
+        for (n_completed_in_block, next_n_broken), n_ways in block_transfer[(lag % len(sequences), n_broken)].items():
+            next_lag = lag + n_completed_in_block - len(sequences)
+            next_n_completed = next_lag + len(sequences) * (n_blocks_done + 1)
+            # we can't start more sequences than there are, not even the ones every remaining block completes
+            if next_n_completed + min_completed_per_block * n_blocks_left > n_sequences or (next_n_completed == n_sequences and next_n_broken > 0):
+                continue
+            # we have to be able to complete them in the remaining blocks
+            if next_n_completed + max_completed_per_block * n_blocks_left < n_sequences - 1:
+                continue
+            # and they have to fit into the remaining springs
+            if min_length(next_n_completed, next_n_broken) > block_length * n_blocks_left:
+                continue
+            next_states[(next_lag, next_n_broken)] = n_ways
+        return next_states
+
+    states: dict[BoundaryState, int] = {(0, 0): 1}
+    for block_index in range(unfolding_factor):
+        block_transfer = first_transfer if block_index == 0 else transfer
+        next_states: dict[BoundaryState, int] = defaultdict(int)
+        for state, n_ways in states.items():
+            for next_state, n_ways_in_block in carry(state, block_transfer, block_index).items():
+                next_states[next_state] += n_ways * n_ways_in_block
+        n_blocks_left = unfolding_factor - block_index - 1
+        # the lag is bounded: every further block maps these states onto themselves, so unless squaring them costs more than walking the blocks, we take the matrix power
+        is_stationary = block_index > 0 and n_blocks_left > 0 and next_states.keys() == states.keys()
+        if is_stationary and len(states) * n_blocks_left.bit_length() < n_blocks_left:
+            matrix = {state: {next_state: n_ways for next_state, n_ways in carry(state, transfer, block_index + 1).items() if next_state in states} for state in states.keys()}
+            remaining = power(matrix, n_blocks_left)
+            states = defaultdict(int)
+            for state, n_ways in next_states.items():
+                for final_state, n_final_ways in remaining[state].items():
+                    states[final_state] += n_ways * n_final_ways
+            break
+        states = next_states
+        # a widening band costs more per block than the plain DP, which walks one block in block_length * n_sequences steps
+        n_transitions = sum(len(transfer[(lag % len(sequences), n_broken)]) for lag, n_broken in states.keys())
+        if TRANSITION_COST * n_transitions > block_length * n_sequences:
+            return compute_possible_arrangements(unfold_spring_line(spring_line, unfolding_factor), unfold_sequences(sequences, unfolding_factor))
+    # the last sequence may still be waiting for a working spring after it
+    return states.get((0, 0), 0) + states.get((-1, sequences[-1]), 0)
+
+
+def solution(input_file: str, unfolding_factor: int = UNFOLDING_FACTOR):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
     spring_lines, sequences = zip(*map(parse_line, lines))
-    spring_lines = list(map(unfold_spring_line, spring_lines))
-    sequences = list(map(unfold_sequences, sequences))
-    return sum([compute_possible_arrangements(spring_line, sequence) for spring_line, sequence in zip(spring_lines, sequences)])
+    return sum([compute_unfolded_arrangements(spring_line, sequence, unfolding_factor) for spring_line, sequence in zip(spring_lines, sequences)])
 
 
 def main():
+    for unfolding_factor in range(1, 4):
+        unfolded_spring_line = unfold_spring_line("?###????????", unfolding_factor)
+        unfolded_sequences = unfold_sequences([3, 2, 1], unfolding_factor)
+        assert compute_unfolded_arrangements("?###????????", [3, 2, 1], unfolding_factor) == compute_possible_arrangements(unfolded_spring_line, unfolded_sequences)
+    assert compute_unfolded_arrangements("?#??", [2], 1000) == compute_possible_arrangements(unfold_spring_line("?#??", 1000), unfold_sequences([2], 1000))
     assert solution("test_input.txt") == 525152
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
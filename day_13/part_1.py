@@ -1,37 +1,48 @@
-import numpy as np
-import numpy.typing as npt
+N_SMUDGES = 0
 
 
-def parse_patterns(content: str) -> npt.NDArray:
-    pattern_strings = content.split("\n\n")
-    return [np.array([[c for c in line] for line in pattern_string.splitlines()]) for pattern_string in pattern_strings]
+# the rows and the columns of a pattern, each encoded as a bitmask where '#' is 1
+Pattern = tuple[list[int], list[int]]
 
 
-def find_vertical_symmetry(pattern: npt.NDArray) -> int:
-    for x in range(1, pattern.shape[1]):
-        min_elements = min(x, pattern.shape[1] - x)
-        if np.all(pattern[:, x:x + min_elements] == pattern[:, x - 1::-1][:, :min_elements]):
-            return x
-    return 0
+def encode_lines(lines: list[str]) -> list[int]:
+    return [int(line.replace("#", "1").replace(".", "0"), 2) for line in lines]
+
+
+def parse_pattern(pattern_string: str) -> Pattern:
+    rows = pattern_string.splitlines()
+    columns = ["".join(column) for column in zip(*rows)]
+    return encode_lines(rows), encode_lines(columns)
+
+
+def parse_patterns(content: str) -> list[Pattern]:
+    return list(map(parse_pattern, content.split("\n\n")))
+
 
+def find_symmetry(lines: list[int], n_smudges: int) -> int:
+    """Finds the number of lines before the axis that mirrors the lines with exactly n_smudges differences, 0 if there is none."""
 
-def find_horizontal_symmetry(pattern: npt.NDArray) -> int:
-    for y in range(1, pattern.shape[0]):
-        min_elements = min(y, pattern.shape[0] - y)
-        if np.all(pattern[y:y + min_elements, :] == pattern[y - 1::-1, :][:min_elements, :]):
-            return y
+    for axis in range(1, len(lines)):
+        n_differences = 0
+        for offset in range(min(axis, len(lines) - axis)):
+            n_differences += (lines[axis - 1 - offset] ^ lines[axis + offset]).bit_count()
+            if n_differences > n_smudges:
+                break
+        if n_differences == n_smudges:
+            return axis
     return 0
 
 
-def symmetry_score(pattern: npt.NDArray) -> int:
-    return find_vertical_symmetry(pattern) + 100 * find_horizontal_symmetry(pattern)
+def symmetry_score(pattern: Pattern, n_smudges: int) -> int:
+    rows, columns = pattern
+    return find_symmetry(columns, n_smudges) + 100 * find_symmetry(rows, n_smudges)
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         content = f.read()
     patterns = parse_patterns(content)
-    return sum(map(symmetry_score, patterns))
+    return sum([symmetry_score(pattern, N_SMUDGES) for pattern in patterns])
 
 
 def main():
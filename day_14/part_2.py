@@ -1,11 +1,11 @@
+import hashlib
 import numpy as np
 import numpy.typing as npt
+from dataclasses import dataclass
 from enum import Enum, auto
 
 
 N_CYCLES = 1000000000
-N_CYCLES_BEFORE_LOOP_CHECK = 1000
-MAX_LOOP_SIZE = 100
 
 
 class Direction(Enum):
@@ -15,76 +15,121 @@ class Direction(Enum):
     West = auto()
 
 
-def parse_rocks(lines: list[str]) -> npt.NDArray:
-    return np.array([[c for c in line] for line in lines])
+def parse_rocks(lines: list[str]) -> tuple[npt.NDArray[np.bool_], npt.NDArray[np.bool_]]:
+    rocks = np.array([[c for c in line] for line in lines])
+    return rocks == "#", rocks == "O"
 
 
-def tilt(rocks: npt.NDArray, direction: Direction) -> None:
+def orient(arr: npt.NDArray, direction: Direction) -> npt.NDArray:
+    """Views the platform such that tilting in the direction moves the rocks towards index 0 along axis 0."""
+
+    if direction == Direction.North:
+        return arr
+    if direction == Direction.South:
+        return arr[::-1]
+    if direction == Direction.West:
+        return arr.T
+    if direction == Direction.East:
+        return arr[:, ::-1].T
+    raise ValueError("Unknown Direction.")
+
+
+def unorient(arr: npt.NDArray, direction: Direction) -> npt.NDArray:
+    """Inverse of orient."""
+
     if direction == Direction.North:
-        for i in range(rocks.shape[1]):
-            tilt_column(rocks[:, i])
-    elif direction == Direction.South:
-        for i in range(rocks.shape[1]):
-            tilt_column(rocks[::-1, i])
-    elif direction == Direction.West:
-        for i in range(rocks.shape[0]):
-            tilt_column(rocks[i, :])
-    elif direction == Direction.East:
-        for i in range(rocks.shape[0]):
-            tilt_column(rocks[i, ::-1])
-
-
-def tilt_column(column: npt.NDArray) -> None:
-    last_cube = -1
-    n_round_since_cube = 0
-    for i, stone in enumerate(column):
-        if stone == "#":
-            last_cube = i
-            n_round_since_cube = 0
-        elif stone == "O":
-            column[i] = "."
-            column[last_cube + n_round_since_cube + 1] = "O"
-            n_round_since_cube += 1
-
-
-def cycle(rocks: npt.NDArray) -> None:
+        return arr
+    if direction == Direction.South:
+        return arr[::-1]
+    if direction == Direction.West:
+        return arr.T
+    if direction == Direction.East:
+        return arr.T[:, ::-1]
+    raise ValueError("Unknown Direction.")
+
+
+@dataclass
+class Segments:
+    """The stretches between cube rocks along axis 0 of an oriented platform, round rocks pile up at their starts."""
+
+    is_open: npt.NDArray[np.bool_]
+    # for every tile, the index of the first and one after the last tile of its segment along axis 0
+    start: npt.NDArray[np.int64]
+    end: npt.NDArray[np.int64]
+    # for every tile, how far it is from the start of its segment
+    rank: npt.NDArray[np.int64]
+
+
+def compute_segments(is_cube: npt.NDArray[np.bool_]) -> Segments:
+    n_rows = is_cube.shape[0]
+    row_indices = np.broadcast_to(np.arange(n_rows)[:, np.newaxis], is_cube.shape)
+    last_cube = np.maximum.accumulate(np.where(is_cube, row_indices, -1), axis=0)
+    next_cube = np.minimum.accumulate(np.where(is_cube, row_indices, n_rows)[::-1], axis=0)[::-1]
+    start = last_cube + 1
+    return Segments(~is_cube, start, next_cube, row_indices - start)
+
+
+def tilt(is_round: npt.NDArray[np.bool_], segments: Segments) -> npt.NDArray[np.bool_]:
+    """Tilts an oriented platform: every segment is filled from its start with as many round rocks as it contains."""
+
+    # n_round_before[i] is the number of round rocks in rows < i
+    n_round_before = np.zeros((is_round.shape[0] + 1, is_round.shape[1]), dtype=np.int64)
+    np.cumsum(is_round, axis=0, out=n_round_before[1:])
+    n_round_in_segment = np.take_along_axis(n_round_before, segments.end, axis=0) - np.take_along_axis(n_round_before, segments.start, axis=0)
+    return segments.is_open & (segments.rank < n_round_in_segment)
+
+
+def compute_all_segments(is_cube: npt.NDArray[np.bool_]) -> dict[Direction, Segments]:
+    return {direction: compute_segments(orient(is_cube, direction)) for direction in Direction}
+
+
+def cycle(is_round: npt.NDArray[np.bool_], all_segments: dict[Direction, Segments]) -> npt.NDArray[np.bool_]:
     for direction in [Direction.North, Direction.West, Direction.South, Direction.East]:
-        tilt(rocks, direction)
+        is_round = unorient(tilt(orient(is_round, direction), all_segments[direction]), direction)
+    return is_round
 
 
 def compute_load_per_row(n_rows: int) -> npt.NDArray[np.uint64]:
     return np.array([n_rows - i for i in range(n_rows)], dtype=np.uint64)
 
 
-def compute_load(rock_hash: npt.NDArray[np.bool_]) -> int:
-    load_per_row = compute_load_per_row(rock_hash.shape[0])
-    return np.einsum("ij, i -> ", rock_hash, load_per_row)
-
-
-def hash_rocks(rocks: npt.NDArray) -> npt.NDArray[np.bool_]:
-    return rocks == "O"
+def compute_load(is_round: npt.NDArray[np.bool_]) -> int:
+    load_per_row = compute_load_per_row(is_round.shape[0])
+    return int(np.einsum("ij, i -> ", is_round, load_per_row))
 
 
-def find_loop(hashes: list[npt.NDArray[np.bool_]]) -> list[int]:
-    for loop_size in range(1, MAX_LOOP_SIZE):
-        if np.all(hashes[-1] == hashes[-loop_size - 1]):
-            return hashes[-loop_size:]
-    return None
+def hash_rocks(is_round: npt.NDArray[np.bool_]) -> bytes:
+    return hashlib.blake2b(np.packbits(is_round).tobytes(), digest_size=16).digest()
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
-    rocks = parse_rocks(lines)
-    hashes = []
-    for _ in range(N_CYCLES_BEFORE_LOOP_CHECK):
-        cycle(rocks)
-        hashes.append(hash_rocks(rocks))
-    loop = find_loop(hashes)
-    return compute_load(loop[(N_CYCLES - N_CYCLES_BEFORE_LOOP_CHECK - 1) % len(loop)])
+    is_cube, is_round = parse_rocks(lines)
+    all_segments = compute_all_segments(is_cube)
+    # loads[i] is the load after i + 1 cycles, first_seen maps the hash of a state to the i it first appeared at
+    loads: list[int] = []
+    first_seen: dict[bytes, int] = {}
+    for _ in range(N_CYCLES):
+        is_round = cycle(is_round, all_segments)
+        rock_hash = hash_rocks(is_round)
+        if rock_hash in first_seen:
+            loop_start = first_seen[rock_hash]
+            loop_size = len(loads) - loop_start
+            return loads[loop_start + (N_CYCLES - 1 - loop_start) % loop_size]
+        first_seen[rock_hash] = len(loads)
+        loads.append(compute_load(is_round))
+    return loads[-1]
 
 
 def main():
+    with open("test_input.txt", 'r') as f:
+        is_cube, is_round = parse_rocks(f.read().splitlines())
+    all_segments = compute_all_segments(is_cube)
+    for n_cycles in range(1, 4):
+        is_round = cycle(is_round, all_segments)
+        with open(f"cycle_{n_cycles}.txt", 'r') as f:
+            assert np.all(is_round == parse_rocks(f.read().splitlines())[1])
     assert solution("test_input.txt") == 64
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
@@ -1,21 +1,30 @@
+import numpy as np
+import numpy.typing as npt
+
+
 def parse_instructions(line: str) -> list[str]:
     return line.split(",")
 
 
-def hash_instruction(instruction: str) -> int:
-    hash_result = 0
-    for c in instruction:
-        hash_result += ord(c)
-        hash_result *= 17
-        hash_result %= 256
-    return hash_result
+def hash_instructions(instructions: list[str]) -> npt.NDArray[np.uint8]:
+    """Hashes all instructions at once, one character position at a time."""
+
+    lengths = np.array(list(map(len, instructions)))
+    # pads the instructions with 0 bytes to the length of the longest instruction
+    chars = np.array(instructions, dtype=bytes)
+    chars = chars.view(np.uint8).reshape(len(instructions), chars.itemsize)
+    # uint8 arithmetic wraps around, which takes care of the % 256
+    hashes = np.zeros(len(instructions), dtype=np.uint8)
+    for position in range(chars.shape[1]):
+        hashes = np.where(position < lengths, (hashes + chars[:, position]) * np.uint8(17), hashes)
+    return hashes
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         line = f.read().strip()
     instructions = parse_instructions(line)
-    return sum(map(hash_instruction, instructions))
+    return int(np.sum(hash_instructions(instructions), dtype=np.int64))
 
 
 def main():
@@ -1,17 +1,23 @@
-from collections import deque
+import numpy as np
+import numpy.typing as npt
 
 
 def parse_instructions(line: str) -> list[str]:
     return line.split(",")
 
 
-def hash_instruction(instruction: str) -> int:
-    hash_result = 0
-    for c in instruction:
-        hash_result += ord(c)
-        hash_result *= 17
-        hash_result %= 256
-    return hash_result
+def hash_instructions(instructions: list[str]) -> npt.NDArray[np.uint8]:
+    """Hashes all instructions at once, one character position at a time."""
+
+    lengths = np.array(list(map(len, instructions)))
+    # pads the instructions with 0 bytes to the length of the longest instruction
+    chars = np.array(instructions, dtype=bytes)
+    chars = chars.view(np.uint8).reshape(len(instructions), chars.itemsize)
+    # uint8 arithmetic wraps around, which takes care of the % 256
+    hashes = np.zeros(len(instructions), dtype=np.uint8)
+    for position in range(chars.shape[1]):
+        hashes = np.where(position < lengths, (hashes + chars[:, position]) * np.uint8(17), hashes)
+    return hashes
 
 
 def parse_instruction(instruction: str) -> tuple[str, str, int]:
@@ -20,46 +26,35 @@ def parse_instruction(instruction: str) -> tuple[str, str, int]:
     return instruction[:-2], "=", int(instruction[-1])
 
 
-def remove_lens(box: deque, label: str) -> None:
-    for label_in_box, lens_in_box in box:
-        if label_in_box == label:
-            box.remove((label_in_box, lens_in_box))
-            return
-
-
-def replace_lens(box: deque, label: str, lens: int) -> None:
-    for i, (label_in_box, lens_in_box) in enumerate(box):
-        if label_in_box == label:
-            box.remove((label_in_box, lens_in_box))
-            box.insert(i, (label, lens))
-            return
-    box.append((label, lens))
+# label -> focal length, dicts keep the insertion order, which is the order of the lenses in the box
+Box = dict[str, int]
 
 
-def init_boxes() -> list[deque]:
-    return [deque() for _ in range(256)]
+def init_boxes() -> list[Box]:
+    return [{} for _ in range(256)]
 
 
-def execute_instruction(instruction: str, boxes: list[deque]) -> None:
-    label, operation, lens = parse_instruction(instruction)
-    box = boxes[hash_instruction(label)]
+def execute_instruction(label: str, operation: str, lens: int, box: Box) -> None:
     if operation == "-":
-        remove_lens(box, label)
+        box.pop(label, None)
     else:
-        replace_lens(box, label, lens)
+        # replacing a lens keeps its position, a new lens goes to the back
+        box[label] = lens
 
 
-def compute_focusing_power(boxes: list[deque]) -> int:
-    return sum([box_number * sum([lens_number * lens for lens_number, (_, lens) in enumerate(box, 1)]) for box_number, box in enumerate(boxes, 1)])
+def compute_focusing_power(boxes: list[Box]) -> int:
+    return sum([box_number * sum([lens_number * lens for lens_number, lens in enumerate(box.values(), 1)]) for box_number, box in enumerate(boxes, 1)])
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         line = f.read().strip()
-    instructions = parse_instructions(line)
+    instructions = list(map(parse_instruction, parse_instructions(line)))
+    labels = [label for label, _, _ in instructions]
+    box_indices = hash_instructions(labels)
     boxes = init_boxes()
-    for instruction in instructions:
-        execute_instruction(instruction, boxes)
+    for (label, operation, lens), box_index in zip(instructions, box_indices):
+        execute_instruction(label, operation, lens, boxes[box_index])
     return compute_focusing_power(boxes)
 
 
@@ -10,15 +10,11 @@ class Direction(Enum):
     West = auto()
 
 
-Position = npt.NDArray[np.int8]
-Ray = tuple[Position, Direction]
+DIRECTIONS = list(Direction)
 
-WALK = {
-    Direction.North: np.array([-1, 0], dtype=np.int8),
-    Direction.South: np.array([1, 0], dtype=np.int8),
-    Direction.East: np.array([0, 1], dtype=np.int8),
-    Direction.West: np.array([0, -1], dtype=np.int8),
-}
+EMPTY = 0
+OUTSIDE = 5
+TILE_CODES = {".": EMPTY, "/": 1, "\\": 2, "|": 3, "-": 4}
 
 
 def parse_contraption(lines: list[str]) -> npt.NDArray:
@@ -64,33 +60,60 @@ def visualize(bool_array: npt.NDArray[np.bool_]) -> npt.NDArray:
     return visualization
 
 
-def trace_paths(contraption: npt.NDArray) -> int:
-    travelling_light = {direction: np.full(contraption.shape, False) for direction in Direction}
-    rays: list[Ray] = [(np.array([0, 0], dtype=np.int8), Direction.East)]
-    travelling_light[Direction.East][0, 0] = True
+def encode_contraption(contraption: npt.NDArray) -> tuple[bytes, int]:
+    """Flattens the contraption into tile codes, padded by a border of OUTSIDE tiles. Returns the codes and the padded width."""
+
+    codes = np.full((contraption.shape[0] + 2, contraption.shape[1] + 2), OUTSIDE, dtype=np.uint8)
+    for tile, code in TILE_CODES.items():
+        codes[1:-1, 1:-1][contraption == tile] = code
+    return codes.tobytes(), codes.shape[1]
+
+
+def compute_diversions() -> list[tuple[int, ...]]:
+    """diversions[tile code << 2 | direction index] are the indices of the directions the light leaves the tile in."""
+
+    diversions: list[tuple[int, ...]] = [()] * ((OUTSIDE + 1) << 2)
+    for tile, code in TILE_CODES.items():
+        for direction_index, direction in enumerate(DIRECTIONS):
+            diversions[code << 2 | direction_index] = tuple(DIRECTIONS.index(new_direction) for new_direction in divert_light(tile, direction))
+    return diversions
+
+
+DIVERSIONS = compute_diversions()
+
+
+def count_energized(codes: bytes, width: int, start_index: int, start_direction_index: int) -> int:
+    """Traces the light on flat indices of the encoded contraption, where visited[i] has bit d set if light went through tile i in DIRECTIONS[d]."""
+
+    offsets = (-width, width, 1, -1)
+    diversions = DIVERSIONS
+    visited = bytearray(len(codes))
+    rays = [(start_index, start_direction_index)]
     while len(rays) > 0:
-        # walk 1 step
-        ray_position, ray_direction = rays.pop()
-        new_directions = divert_light(contraption[*ray_position], ray_direction)
-        # keep computing relevant paths
-        for new_direction in new_directions:
-            new_position = ray_position + WALK[new_direction]
-            # if we reached the edge, we can stop
-            if np.any(new_position < 0) or np.any(new_position >= contraption.shape):
-                continue
-            # if we've already seen this ray, we can stop
-            if travelling_light[new_direction][*new_position]:
-                continue
-            rays.append((new_position, new_direction))
-            travelling_light[new_direction][*new_position] = True
-    return np.count_nonzero(travelling_light[Direction.North] | travelling_light[Direction.South] | travelling_light[Direction.East] | travelling_light[Direction.West])
+        index, direction_index = rays.pop()
+        while True:
+            code = codes[index]
+            direction_bit = 1 << direction_index
+            if code == OUTSIDE or visited[index] & direction_bit:
+                break
+            visited[index] |= direction_bit
+            # skip straight over empty tiles, only look up the diversions at mirrors and splitters
+            if code != EMPTY:
+                new_direction_indices = diversions[code << 2 | direction_index]
+                direction_index = new_direction_indices[0]
+                if len(new_direction_indices) > 1:
+                    rays.append((index + offsets[new_direction_indices[1]], new_direction_indices[1]))
+            index += offsets[direction_index]
+    return len(visited) - visited.count(0)
 
 
 def solution(input_file: str):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
     contraption = parse_contraption(lines)
-    return trace_paths(contraption)
+    codes, width = encode_contraption(contraption)
+    # the top left tile is at (1, 1) after padding
+    return count_energized(codes, width, width + 1, DIRECTIONS.index(Direction.East))
 
 
 def main():
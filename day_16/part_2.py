@@ -1,6 +1,8 @@
+import os
 import numpy as np
 import numpy.typing as npt
 from enum import Enum, auto
+from multiprocessing import Pool, shared_memory
 
 
 class Direction(Enum):
@@ -10,16 +12,18 @@ class Direction(Enum):
     West = auto()
 
 
-Position = npt.NDArray[np.int8]
-Ray = tuple[Position, Direction]
-
+DIRECTIONS = list(Direction)
 WALK = {
-    Direction.North: np.array([-1, 0], dtype=np.int8),
-    Direction.South: np.array([1, 0], dtype=np.int8),
-    Direction.East: np.array([0, 1], dtype=np.int8),
-    Direction.West: np.array([0, -1], dtype=np.int8),
+    Direction.North: (-1, 0),
+    Direction.South: (1, 0),
+    Direction.East: (0, 1),
+    Direction.West: (0, -1),
 }
 
+EMPTY = 0
+OUTSIDE = 5
+TILE_CODES = {".": EMPTY, "/": 1, "\\": 2, "|": 3, "-": 4}
+
 
 def parse_contraption(lines: list[str]) -> npt.NDArray:
     return np.array([[c for c in line] for line in lines])
@@ -64,42 +68,258 @@ def visualize(bool_array: npt.NDArray[np.bool_]) -> npt.NDArray:
     return visualization
 
 
-def count_energized(contraption: npt.NDArray, starting_ray: Ray) -> int:
-    travelling_light = {direction: np.full(contraption.shape, False) for direction in Direction}
-    rays: list[Ray] = [starting_ray]
-    starting_position, starting_direction = starting_ray
-    travelling_light[starting_direction][*starting_position] = True
+def encode_contraption(contraption: npt.NDArray) -> tuple[bytes, int]:
+    """Flattens the contraption into tile codes, padded by a border of OUTSIDE tiles. Returns the codes and the padded width."""
+
+    codes = np.full((contraption.shape[0] + 2, contraption.shape[1] + 2), OUTSIDE, dtype=np.uint8)
+    for tile, code in TILE_CODES.items():
+        codes[1:-1, 1:-1][contraption == tile] = code
+    return codes.tobytes(), codes.shape[1]
+
+
+def compute_diversions() -> list[tuple[int, ...]]:
+    """diversions[tile code << 2 | direction index] are the indices of the directions the light leaves the tile in."""
+
+    diversions: list[tuple[int, ...]] = [()] * ((OUTSIDE + 1) << 2)
+    for tile, code in TILE_CODES.items():
+        for direction_index, direction in enumerate(DIRECTIONS):
+            diversions[code << 2 | direction_index] = tuple(DIRECTIONS.index(new_direction) for new_direction in divert_light(tile, direction))
+    return diversions
+
+
+DIVERSIONS = compute_diversions()
+
+
+def count_energized(codes: bytes, width: int, start_index: int, start_direction_index: int) -> int:
+    """Traces the light on flat indices of the encoded contraption, where visited[i] has bit d set if light went through tile i in DIRECTIONS[d]."""
+
+    offsets = (-width, width, 1, -1)
+    diversions = DIVERSIONS
+    visited = bytearray(len(codes))
+    rays = [(start_index, start_direction_index)]
     while len(rays) > 0:
-        # walk 1 step
-        ray_position, ray_direction = rays.pop()
-        new_directions = divert_light(contraption[*ray_position], ray_direction)
-        # keep computing relevant paths
-        for new_direction in new_directions:
-            new_position = ray_position + WALK[new_direction]
-            # if we reached the edge, we can stop
-            if np.any(new_position < 0) or np.any(new_position >= contraption.shape):
+        index, direction_index = rays.pop()
+        while True:
+            code = codes[index]
+            direction_bit = 1 << direction_index
+            if code == OUTSIDE or visited[index] & direction_bit:
+                break
+            visited[index] |= direction_bit
+            # skip straight over empty tiles, only look up the diversions at mirrors and splitters
+            if code != EMPTY:
+                new_direction_indices = diversions[code << 2 | direction_index]
+                direction_index = new_direction_indices[0]
+                if len(new_direction_indices) > 1:
+                    rays.append((index + offsets[new_direction_indices[1]], new_direction_indices[1]))
+            index += offsets[direction_index]
+    return len(visited) - visited.count(0)
+
+
+# a beam entering the non-empty tile at (y, x), travelling in a direction
+Node = tuple[int, int, Direction]
+# a straight line of tiles: first tile (y, x), direction, number of tiles
+Segment = tuple[int, int, Direction, int]
+
+
+def compute_column_bits(width: int, height: int) -> list[int]:
+    """column_bits[x] has the bits of all tiles in column x set, where tile (y, x) is bit y * width + x."""
+
+    return [sum(1 << (y * width + x) for y in range(height)) for x in range(width)]
+
+
+def compute_segment_bits(segment: Segment, width: int, column_bits: list[int]) -> int:
+    y, x, direction, n_tiles = segment
+    if n_tiles == 0:
+        return 0
+    dy, dx = WALK[direction]
+    # the bits are set from the tile with the smallest index
+    if dy == 0:
+        first_x = x if dx > 0 else x - n_tiles + 1
+        return ((1 << n_tiles) - 1) << (y * width + first_x)
+    first_y = y if dy > 0 else y - n_tiles + 1
+    rows_mask = ((1 << ((first_y + n_tiles) * width)) - 1) ^ ((1 << (first_y * width)) - 1)
+    return column_bits[x] & rows_mask
+
+
+def walk_straight(rows: list[str], y: int, x: int, direction: Direction) -> tuple[Segment, Node | None]:
+    """Walks from (y, x) over empty tiles. Returns the walked segment and the node of the first non-empty tile, or None if the beam leaves the contraption."""
+
+    height, width = len(rows), len(rows[0])
+    dy, dx = WALK[direction]
+    start_y, start_x = y, x
+    while 0 <= y < height and 0 <= x < width and rows[y][x] == ".":
+        y, x = y + dy, x + dx
+    node = (y, x, direction) if 0 <= y < height and 0 <= x < width else None
+    return (start_y, start_x, direction, abs(y - start_y) + abs(x - start_x)), node
+
+
+def build_beam_graph(rows: list[str]) -> tuple[dict[Node, list[Segment]], dict[Node, list[Node]]]:
+    """Builds the graph of beams entering non-empty tiles, connected by straight segments over empty tiles. Also returns the segments every node energizes itself."""
+
+    segments: dict[Node, list[Segment]] = {}
+    successors: dict[Node, list[Node]] = {}
+    for y, row in enumerate(rows):
+        for x, tile in enumerate(row):
+            if tile == ".":
                 continue
-            # if we've already seen this ray, we can stop
-            if travelling_light[new_direction][*new_position]:
+            for direction in Direction:
+                node = (y, x, direction)
+                # segments are kept small, as bits they would be as wide as the whole contraption
+                segments[node] = [(y, x, direction, 1)]
+                successors[node] = []
+                for new_direction in divert_light(tile, direction):
+                    dy, dx = WALK[new_direction]
+                    segment, next_node = walk_straight(rows, y + dy, x + dx, new_direction)
+                    segments[node].append(segment)
+                    if next_node is not None:
+                        successors[node].append(next_node)
+    return segments, successors
+
+
+def find_strongly_connected_components(successors: dict[Node, list[Node]]) -> list[list[Node]]:
+    """Tarjan's algorithm without recursion, returns the components in reverse topological order."""
+
+    index: dict[Node, int] = {}
+    low_link: dict[Node, int] = {}
+    on_stack: set[Node] = set()
+    stack: list[Node] = []
+    components: list[list[Node]] = []
+    for root in successors.keys():
+        if root in index:
+            continue
+        # (node, index of the next successor to look at)
+        call_stack = [(root, 0)]
+        index[root] = low_link[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while len(call_stack) > 0:
+            node, successor_index = call_stack.pop()
+            if successor_index < len(successors[node]):
+                call_stack.append((node, successor_index + 1))
+                successor = successors[node][successor_index]
+                if successor not in index:
+                    index[successor] = low_link[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    call_stack.append((successor, 0))
+                elif successor in on_stack:
+                    low_link[node] = min(low_link[node], index[successor])
                 continue
-            rays.append((new_position, new_direction))
-            travelling_light[new_direction][*new_position] = True
-    return np.count_nonzero(travelling_light[Direction.North] | travelling_light[Direction.South] | travelling_light[Direction.East] | travelling_light[Direction.West])
+            # all successors are done, pass the low link up to the parent
+            if len(call_stack) > 0:
+                parent = call_stack[-1][0]
+                low_link[parent] = min(low_link[parent], low_link[node])
+            if low_link[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def get_starting_rays(height: int, width: int) -> list[tuple[int, int, Direction]]:
+    starting_rays = []
+    for x in range(width):
+        starting_rays.append((0, x, Direction.South))
+        starting_rays.append((height - 1, x, Direction.North))
+    for y in range(height):
+        starting_rays.append((y, 0, Direction.East))
+        starting_rays.append((y, width - 1, Direction.West))
+    return starting_rays
 
 
 def find_max_energized(contraption: npt.NDArray) -> int:
-    all_possibilities = []
-    for x in range(contraption.shape[1]):
-        starting_ray = (np.array([0, x], dtype=np.int8), Direction.South)
-        all_possibilities.append(count_energized(contraption, starting_ray))
-        starting_ray = (np.array([contraption.shape[0] - 1, x], dtype=np.int8), Direction.North)
-        all_possibilities.append(count_energized(contraption, starting_ray))
-    for y in range(contraption.shape[0]):
-        starting_ray = (np.array([y, 0], dtype=np.int8), Direction.East)
-        all_possibilities.append(count_energized(contraption, starting_ray))
-        starting_ray = (np.array([y, contraption.shape[1] - 1], dtype=np.int8), Direction.West)
-        all_possibilities.append(count_energized(contraption, starting_ray))
-    return max(all_possibilities)
+    """Condenses the beam graph and computes the energized tiles of every component from its successor components in reverse topological order."""
+
+    rows = ["".join(row) for row in contraption]
+    height, width = contraption.shape
+    column_bits = compute_column_bits(width, height)
+    segments, successors = build_beam_graph(rows)
+    components = find_strongly_connected_components(successors)
+    component_of = {node: component_index for component_index, component in enumerate(components) for node in component}
+    successor_components = [{component_of[successor] for node in component for successor in successors[node]} - {component_index} for component_index, component in enumerate(components)]
+    del successors
+    # the starting rays that run into a component, rays that run through empty tiles only are done right away
+    max_energized = 0
+    starting_segments: list[list[Segment]] = [[] for _ in components]
+    for y, x, direction in get_starting_rays(height, width):
+        segment, node = walk_straight(rows, y, x, direction)
+        if node is None:
+            max_energized = max(max_energized, segment[3])
+        else:
+            starting_segments[component_of[node]].append(segment)
+    # only keep the bits of a component while a predecessor still needs them
+    n_users = [0] * len(components)
+    for component_successors in successor_components:
+        for successor_component in component_successors:
+            n_users[successor_component] += 1
+    energized_by_component: dict[int, int] = {}
+    for component_index, component in enumerate(components):
+        energized = 0
+        for node in component:
+            for segment in segments.pop(node):
+                energized |= compute_segment_bits(segment, width, column_bits)
+        for successor_component in successor_components[component_index]:
+            energized |= energized_by_component[successor_component]
+            n_users[successor_component] -= 1
+            if n_users[successor_component] == 0:
+                del energized_by_component[successor_component]
+        for segment in starting_segments[component_index]:
+            max_energized = max(max_energized, (energized | compute_segment_bits(segment, width, column_bits)).bit_count())
+        if n_users[component_index] > 0:
+            energized_by_component[component_index] = energized
+    return max_energized
+
+
+def find_max_energized_by_tracing(contraption: npt.NDArray) -> int:
+    codes, width = encode_contraption(contraption)
+    height = contraption.shape[0]
+    # +1 because of the padding
+    return max(count_energized(codes, width, (y + 1) * width + x + 1, DIRECTIONS.index(direction)) for y, x, direction in get_starting_rays(height, width - 2))
+
+
+def find_max_energized_in_batch(shared_memory_name: str, n_codes: int, width: int, starting_rays: list[tuple[int, int]]) -> int:
+    """Runs in a worker process, reads the encoded contraption from shared memory instead of getting it pickled."""
+
+    contraption_memory = shared_memory.SharedMemory(name=shared_memory_name)
+    codes = contraption_memory.buf[:n_codes]
+    try:
+        return max(count_energized(codes, width, start_index, start_direction_index) for start_index, start_direction_index in starting_rays)
+    finally:
+        codes.release()
+        contraption_memory.close()
+
+
+def find_max_energized_in_parallel(contraption: npt.NDArray, n_processes: int | None = None, n_batches_per_process: int = 4) -> int:
+    """Spreads batches of starting rays over worker processes, which share the encoded contraption and only send back their maximum."""
+
+    codes, width = encode_contraption(contraption)
+    height = contraption.shape[0]
+    # +1 because of the padding
+    starting_rays = [((y + 1) * width + x + 1, DIRECTIONS.index(direction)) for y, x, direction in get_starting_rays(height, width - 2)]
+    contraption_memory = shared_memory.SharedMemory(create=True, size=len(codes))
+    try:
+        contraption_memory.buf[:len(codes)] = codes
+        n_processes = n_processes or os.cpu_count() or 1
+        with Pool(n_processes) as pool:
+            n_batches = n_processes * n_batches_per_process
+            batches = [starting_rays[i::n_batches] for i in range(n_batches) if len(starting_rays[i::n_batches]) > 0]
+            return max(pool.starmap(find_max_energized_in_batch, [(contraption_memory.name, len(codes), width, batch) for batch in batches]))
+    finally:
+        contraption_memory.close()
+        contraption_memory.unlink()
+
+
+def generate_contraption(height: int, width: int, seed: int = 0) -> npt.NDArray:
+    """A random contraption where about one in six tiles is a mirror or a splitter, like the puzzle input."""
+
+    rng = np.random.default_rng(seed)
+    tiles = list(TILE_CODES.keys())
+    return rng.choice(tiles, size=(height, width), p=[0.83] + [0.17 / (len(tiles) - 1)] * (len(tiles) - 1))
 
 
 def solution(input_file: str):
@@ -110,7 +330,13 @@ def solution(input_file: str):
 
 
 def main():
+    with open("test_input.txt", 'r') as f:
+        contraption = parse_contraption(f.read().splitlines())
+    assert find_max_energized_by_tracing(contraption) == 51
+    assert find_max_energized_in_parallel(contraption) == 51
     assert solution("test_input.txt") == 51
+    large_contraption = generate_contraption(150, 150)
+    assert find_max_energized(large_contraption) == find_max_energized_by_tracing(large_contraption)
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
 
@@ -0,0 +1,43 @@
+import argparse
+import resource
+import time
+import numpy as np
+import numpy.typing as npt
+from crucible import Frontier, shortest_path
+
+
+# (min line length, max line length) of the normal and the ultra crucible
+CRUCIBLES = [(1, 3), (4, 10)]
+DEFAULT_SIZES = [100, 200, 400]
+
+
+def generate_city(height: int, width: int, seed: int = 0) -> npt.NDArray[np.uint8]:
+    """A random city with heat loss 1..9 per block, like the puzzle input."""
+
+    rng = np.random.default_rng(seed)
+    return rng.integers(1, 10, size=(height, width), dtype=np.uint8)
+
+
+def peak_memory_mb() -> float:
+    # linux reports the max resident set size in KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the crucible search on generated square cities.")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES, help="side lengths of the cities, e.g. 4000")
+    args = parser.parse_args()
+    for size in args.sizes:
+        blocks = generate_city(size, size)
+        for min_line_length, max_line_length in CRUCIBLES:
+            answers = []
+            for frontier in Frontier:
+                start = time.perf_counter()
+                answers.append(shortest_path(blocks, min_line_length, max_line_length, frontier))
+                seconds = time.perf_counter() - start
+                print(f"{size}x{size}, lines of {min_line_length}..{max_line_length}, {frontier.name}: {seconds:.2f}s, peak memory {peak_memory_mb():.0f}MB")
+            assert len(set(answers)) == 1, f"Frontiers disagree: {answers}"
+
+
+if __name__ == "__main__":
+    main()
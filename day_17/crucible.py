@@ -0,0 +1,141 @@
+import heapq
+from array import array
+import numpy as np
+import numpy.typing as npt
+from dataclasses import dataclass
+from enum import Enum, auto
+
+
+MAX_INT_VALUE = np.iinfo(np.int32).max
+
+# a state is packed into one int: flat index of the block * 2 + the axis we arrived at the block on
+VERTICAL = 0
+HORIZONTAL = 1
+
+
+class Frontier(Enum):
+    Heap = auto()
+    Buckets = auto()
+
+
+@dataclass
+class City:
+    height: int
+    width: int
+    min_line_length: int
+    max_line_length: int
+    # row_prefix[y * (width + 1) + x] is the heat lost in blocks[y, :x]
+    row_prefix: array
+    # column_prefix[x * (height + 1) + y] is the heat lost in blocks[:y, x]
+    column_prefix: array
+
+    def moves(self, state: int) -> list[tuple[int, int]]:
+        """All states we can reach from this one by turning and going straight, with the heat lost on the way."""
+
+        index, axis = divmod(state, 2)
+        y, x = divmod(index, self.width)
+        # we have to turn, the heat lost on a straight line is a difference of prefix sums
+        moves = []
+        if axis == VERTICAL:
+            row_start = y * (self.width + 1)
+            here = self.row_prefix[row_start + x + 1]
+            for n_steps in range(self.min_line_length, min(self.max_line_length, self.width - 1 - x) + 1):
+                moves.append((2 * (index + n_steps) + HORIZONTAL, self.row_prefix[row_start + x + n_steps + 1] - here))
+            here = self.row_prefix[row_start + x]
+            for n_steps in range(self.min_line_length, min(self.max_line_length, x) + 1):
+                moves.append((2 * (index - n_steps) + HORIZONTAL, here - self.row_prefix[row_start + x - n_steps]))
+        else:
+            column_start = x * (self.height + 1)
+            here = self.column_prefix[column_start + y + 1]
+            for n_steps in range(self.min_line_length, min(self.max_line_length, self.height - 1 - y) + 1):
+                moves.append((2 * (index + n_steps * self.width) + VERTICAL, self.column_prefix[column_start + y + n_steps + 1] - here))
+            here = self.column_prefix[column_start + y]
+            for n_steps in range(self.min_line_length, min(self.max_line_length, y) + 1):
+                moves.append((2 * (index - n_steps * self.width) + VERTICAL, here - self.column_prefix[column_start + y - n_steps]))
+        return moves
+
+
+def to_int32_array(values: npt.NDArray[np.int32]) -> array:
+    """Python lists of ints cost ~36 bytes per entry, the array module keeps them at 4 bytes."""
+
+    compact = array("i")
+    compact.frombytes(values.astype(np.int32, copy=False).tobytes())
+    return compact
+
+
+def build_city(blocks: npt.NDArray[np.integer], min_line_length: int, max_line_length: int) -> City:
+    height, width = blocks.shape
+    row_prefix = np.zeros((height, width + 1), dtype=np.int32)
+    np.cumsum(blocks, axis=1, dtype=np.int32, out=row_prefix[:, 1:])
+    column_prefix = np.zeros((width, height + 1), dtype=np.int32)
+    np.cumsum(blocks.T, axis=1, dtype=np.int32, out=column_prefix[:, 1:])
+    return City(height, width, min_line_length, max_line_length, to_int32_array(row_prefix), to_int32_array(column_prefix))
+
+
+def init_min_heat_lost(city: City) -> array:
+    """Minimum heat lost when arriving at the block on the axis, as int32 per (block, axis)."""
+
+    min_heat_lost = array("i", [MAX_INT_VALUE]) * (2 * city.height * city.width)
+    # we can leave the start in every direction
+    min_heat_lost[VERTICAL] = min_heat_lost[HORIZONTAL] = 0
+    return min_heat_lost
+
+
+def search_with_heap(city: City) -> int:
+    destination_index = city.height * city.width - 1
+    min_heat_lost = init_min_heat_lost(city)
+    # entries are packed into one int as heat lost * n_states + state, that's a lot smaller than a tuple
+    n_states = len(min_heat_lost)
+    work_list = [VERTICAL, HORIZONTAL]
+    while len(work_list) > 0:
+        heat_lost, state = divmod(heapq.heappop(work_list), n_states)
+        # we already found a better way to this state
+        if heat_lost > min_heat_lost[state]:
+            continue
+        if state // 2 == destination_index:
+            return heat_lost
+        for new_state, line_heat_lost in city.moves(state):
+            new_heat_lost = heat_lost + line_heat_lost
+            if new_heat_lost < min_heat_lost[new_state]:
+                min_heat_lost[new_state] = new_heat_lost
+                heapq.heappush(work_list, new_heat_lost * n_states + new_state)
+    return MAX_INT_VALUE
+
+
+def search_with_buckets(city: City, max_block_heat_loss: int) -> int:
+    """Dial's algorithm: a line loses at most max_line_length * max_block_heat_loss, so that many buckets + 1 in a ring never collide."""
+
+    destination_index = city.height * city.width - 1
+    min_heat_lost = init_min_heat_lost(city)
+    # bucket i % n_buckets holds the states we reached with heat lost i
+    n_buckets = city.max_line_length * max_block_heat_loss + 1
+    buckets: list[list[int]] = [[] for _ in range(n_buckets)]
+    buckets[0] = [VERTICAL, HORIZONTAL]
+    n_queued = 2
+    heat_lost = 0
+    while n_queued > 0:
+        bucket = buckets[heat_lost % n_buckets]
+        while len(bucket) > 0:
+            state = bucket.pop()
+            n_queued -= 1
+            # we already found a better way to this state
+            if heat_lost > min_heat_lost[state]:
+                continue
+            if state // 2 == destination_index:
+                return heat_lost
+            for new_state, line_heat_lost in city.moves(state):
+                new_heat_lost = heat_lost + line_heat_lost
+                if new_heat_lost < min_heat_lost[new_state]:
+                    min_heat_lost[new_state] = new_heat_lost
+                    buckets[new_heat_lost % n_buckets].append(new_state)
+                    n_queued += 1
+        heat_lost += 1
+    return MAX_INT_VALUE
+
+
+def shortest_path(blocks: npt.NDArray[np.integer], min_line_length: int, max_line_length: int, frontier: Frontier = Frontier.Buckets) -> int:
+    assert np.all(np.array(blocks.shape) >= max_line_length + 1), "This problem is not interesting enough for me."
+    city = build_city(blocks, min_line_length, max_line_length)
+    if frontier == Frontier.Heap:
+        return search_with_heap(city)
+    return search_with_buckets(city, int(blocks.max()))
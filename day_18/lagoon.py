@@ -0,0 +1,24 @@
+# how far an instruction moves the digger: (dy, dx), one of them is 0
+Step = tuple[int, int]
+
+
+def compute_vertices(steps: list[Step]) -> list[tuple[int, int]]:
+    y, x = 0, 0
+    vertices = [(y, x)]
+    for dy, dx in steps:
+        y, x = y + dy, x + dx
+        vertices.append((y, x))
+    assert vertices[-1] == vertices[0], "The trench has to be closed."
+    return vertices
+
+
+def compute_lagoon_size(steps: list[Step]) -> int:
+    """Counts the cubes inside and on the trench with the shoelace formula and Pick's theorem."""
+
+    vertices = compute_vertices(steps)
+    # python ints, so gigantic plans can't overflow
+    twice_area = abs(sum(x_1 * y_2 - x_2 * y_1 for (y_1, x_1), (y_2, x_2) in zip(vertices, vertices[1:])))
+    n_boundary_points = sum(abs(dy) + abs(dx) for dy, dx in steps)
+    # pick: area = n_interior_points + n_boundary_points / 2 - 1
+    n_interior_points = (twice_area - n_boundary_points) // 2 + 1
+    return n_interior_points + n_boundary_points
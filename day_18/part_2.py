@@ -1,11 +1,7 @@
-import numpy as np
-import numpy.typing as npt
+import bisect
 from dataclasses import dataclass
-from enum import Enum
-
-
-Index = np.int64
-Position = npt.NDArray[Index]
+from enum import Enum, auto
+from lagoon import Step, compute_lagoon_size
 
 
 class Direction(Enum):
@@ -15,6 +11,11 @@ class Direction(Enum):
     Right = "0"
 
 
+class AreaMethod(Enum):
+    Sweep = auto()
+    Shoelace = auto()
+
+
 @dataclass
 class Instruction:
     direction: Direction
@@ -30,11 +31,11 @@ class Interval:
         self.length = self.end - self.start + 1
 
 
-WALK = {
-    Direction.Up: np.array([-1, 0], dtype=Index),
-    Direction.Down: np.array([1, 0], dtype=Index),
-    Direction.Left: np.array([0, -1], dtype=Index),
-    Direction.Right: np.array([0, 1], dtype=Index),
+WALK: dict[Direction, Step] = {
+    Direction.Up: (-1, 0),
+    Direction.Down: (1, 0),
+    Direction.Left: (0, -1),
+    Direction.Right: (0, 1),
 }
 
 
@@ -45,15 +46,21 @@ def parse_instruction(line: str) -> Instruction:
     return Instruction(direction, length)
 
 
+def compute_step(instruction: Instruction) -> Step:
+    dy, dx = WALK[instruction.direction]
+    return instruction.length * dy, instruction.length * dx
+
+
 def create_intervals(instructions: list[Instruction]) -> list[tuple[int, list[Interval]]]:
-    position = np.array([0, 0], dtype=Index)
+    y, x = 0, 0
     intervals = []
     for instruction in instructions:
         if instruction.direction == Direction.Up:
-            intervals.append((position[1], Interval(position[0] - instruction.length, position[0])))
+            intervals.append((x, Interval(y - instruction.length, y)))
         elif instruction.direction == Direction.Down:
-            intervals.append((position[1], Interval(position[0], position[0] + instruction.length)))
-        position += instruction.length * WALK[instruction.direction]
+            intervals.append((x, Interval(y, y + instruction.length)))
+        dy, dx = compute_step(instruction)
+        y, x = y + dy, x + dx
     intervals.sort()
     intervals_with_same_x = []
     current_x, _ = intervals[0]
@@ -69,40 +76,6 @@ def create_intervals(instructions: list[Instruction]) -> list[tuple[int, list[In
     return intervals_with_same_x
 
 
-def can_connect(interval_1: Interval, interval_2: Interval) -> bool:
-    return interval_1.end == interval_2.start or interval_2.end == interval_1.start
-
-
-def connect(interval_1: Interval, interval_2: Interval) -> Interval:
-    if interval_1.end == interval_2.start:
-        return Interval(interval_1.start, interval_2.end)
-    return Interval(interval_2.start, interval_1.end)
-
-
-def reduce_active(active_intervals: list[Interval]) -> list[Interval]:
-    if len(active_intervals) == 0:
-        return []
-    sorted_intervals = sorted(active_intervals)
-    reduced_intervals = []
-    current_interval = sorted_intervals[0]
-    for interval in sorted_intervals[1:]:
-        if can_connect(current_interval, interval):
-            current_interval = connect(current_interval, interval)
-        else:
-            reduced_intervals.append(current_interval)
-            current_interval = interval
-    reduced_intervals.append(current_interval)
-    return reduced_intervals
-
-
-def includes(big_interval: Interval, small_interval: Interval) -> bool:
-    return big_interval.start <= small_interval.start and small_interval.end <= big_interval.end
-
-
-def overlap(interval_1: Interval, interval_2: Interval) -> bool:
-    return (interval_1.start <= interval_2.start <= interval_1.end) or (interval_1.start <= interval_2.end <= interval_1.end)
-
-
 def cut_interval(big_interval: Interval, small_interval: Interval) -> list[Interval]:
     if big_interval == small_interval:
         return []
@@ -113,48 +86,89 @@ def cut_interval(big_interval: Interval, small_interval: Interval) -> list[Inter
     return [Interval(big_interval.start, small_interval.start), Interval(small_interval.end, big_interval.end)]
 
 
-def cut_all(active_intervals: list[Interval], cutting_intervals: list[Interval]) -> list[Interval]:
-    for interval in cutting_intervals:
-        added_intervals = []
-        removed_intervals = []
-        for active_interval in active_intervals:
-            if includes(active_interval, interval):
-                removed_intervals.append(active_interval)
-                added_intervals += cut_interval(active_interval, interval)
-        active_intervals = [interval for interval in active_intervals if interval not in removed_intervals] + added_intervals
-    return sorted(active_intervals)
+class IntervalSet:
+    """Disjoint intervals sorted by their start, intervals that touch are merged into one."""
+
+    def __init__(self):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add_at(self, i: int, interval: Interval):
+        self.starts.insert(i, interval.start)
+        self.ends.insert(i, interval.end)
+        self.total_length += interval.length
+
+    def remove_at(self, i: int) -> Interval:
+        interval = Interval(self.starts.pop(i), self.ends.pop(i))
+        self.total_length -= interval.length
+        return interval
+
+    def find_including(self, interval: Interval) -> int:
+        """Position of the interval that includes the given one, -1 if there is none."""
+
+        i = bisect.bisect_right(self.starts, interval.start) - 1
+        if i >= 0 and interval.end <= self.ends[i]:
+            return i
+        return -1
+
+    def insert(self, interval: Interval):
+        i = bisect.bisect_left(self.starts, interval.start)
+        start, end = interval.start, interval.end
+        # connect with the interval before and after if they touch
+        if i > 0 and self.ends[i - 1] == start:
+            i -= 1
+            start = self.remove_at(i).start
+        if i < len(self) and self.starts[i] == end:
+            end = self.remove_at(i).end
+        self.add_at(i, Interval(start, end))
+
+    def cut(self, interval: Interval):
+        i = self.find_including(interval)
+        assert i >= 0, f"{interval} does not cut any interval."
+        # the rest of the cut interval stays in the same place in the order
+        for offset, rest in enumerate(cut_interval(self.remove_at(i), interval)):
+            self.add_at(i + offset, rest)
 
 
 def compute_area(intervals_on_same_x: list[tuple[int, list[Interval]]]) -> int:
-    last_x, first_intervals = intervals_on_same_x[0]
-    active_intervals: list[Interval] = first_intervals
-    area = sum([interval.length for interval in active_intervals])
-    for x, intervals in intervals_on_same_x[1:]:
-        cutting_intervals = [interval for interval in intervals if any([includes(active_interval, interval) for active_interval in active_intervals])]
-        non_cutting_intervals = [interval for interval in intervals if interval not in cutting_intervals]
+    last_x, _ = intervals_on_same_x[0]
+    active_intervals = IntervalSet()
+    area = 0
+    for x, intervals in intervals_on_same_x:
+        is_cutting = [active_intervals.find_including(interval) >= 0 for interval in intervals]
         # add all lines i such that last_x < i < x
-        area += (x - last_x - 1) * sum([interval.length for interval in active_intervals])
+        area += (x - last_x - 1) * active_intervals.total_length
         # add all intervals that don't cut other intervals
-        active_intervals += non_cutting_intervals
-        active_intervals = reduce_active(active_intervals)
-        area += sum([interval.length for interval in active_intervals])
+        for interval, cuts in zip(intervals, is_cutting):
+            if not cuts:
+                active_intervals.insert(interval)
+        area += active_intervals.total_length
         # prepare the next iteration
-        active_intervals = cut_all(active_intervals, cutting_intervals)
+        for interval, cuts in zip(intervals, is_cutting):
+            if cuts:
+                active_intervals.cut(interval)
         last_x = x
-    assert len(active_intervals) == 0, active_intervals
+    assert len(active_intervals) == 0, active_intervals.starts
     return area
 
 
-def solution(input_file: str):
+def solution(input_file: str, method: AreaMethod = AreaMethod.Shoelace):
     with open(input_file, 'r') as f:
         lines = f.read().splitlines()
     instructions = list(map(parse_instruction, lines))
-    intervals_on_same_x = create_intervals(instructions)
-    return compute_area(intervals_on_same_x)
+    if method == AreaMethod.Sweep:
+        intervals_on_same_x = create_intervals(instructions)
+        return compute_area(intervals_on_same_x)
+    return compute_lagoon_size(list(map(compute_step, instructions)))
 
 
 def main():
-    assert solution("test_input.txt") == 952408144115
+    for method in AreaMethod:
+        assert solution("test_input.txt", method) == 952408144115
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")
 
@@ -1,7 +1,13 @@
+import numpy as np
+import numpy.typing as npt
 from dataclasses import dataclass
 from enum import Enum
 
-Part = dict[str, int]
+
+ATTRIBUTES = ["x", "m", "a", "s"]
+# jump targets that end the program
+ACCEPTED = -1
+REJECTED = -2
 
 class Comparison(Enum):
     LessThan = "<"
@@ -14,23 +20,24 @@ class Instruction:
     comparison: Comparison
     compared_to: int
     send_to: str
-    
-    def matches(self, part: Part) -> bool:
-        if self.comparison == Comparison.LessThan:
-            return part[self.compared_attribute] < self.compared_to
-        return part[self.compared_attribute] > self.compared_to
 
 
 @dataclass
 class Workflow:
     instructions: list[Instruction]
     else_send_to: str
-    
-    def process(self, part: Part) -> str:
-        for instruction in self.instructions:
-            if instruction.matches(part):
-                return instruction.send_to
-        return self.else_send_to
+
+
+@dataclass
+class Program:
+    """Every instruction is a node, the else of a workflow is the false jump of its last instruction."""
+
+    compared_attribute: npt.NDArray[np.int64]
+    compared_to: npt.NDArray[np.int64]
+    is_less_than: npt.NDArray[np.bool_]
+    jump_true: npt.NDArray[np.int64]
+    jump_false: npt.NDArray[np.int64]
+    start: int
 
 
 def parse_instruction(instruction: str) -> Instruction:
@@ -52,24 +59,58 @@ def parse_workflow(workflow: str) -> tuple[str, Workflow]:
     return name, Workflow(instructions, else_send_to)
 
 
-def parse_part(part_str: str) -> Part:
+def parse_part(part_str: str) -> list[int]:
     assignment_strings = part_str[1:-1].split(",")
     part = {}
     for assignment_string in assignment_strings:
         attribute_name, attribute_value_str = assignment_string.split("=")
         part[attribute_name] = int(attribute_value_str)
-    return part
-
-
-def is_accepted(part: Part, workflows: dict[str, Workflow]) -> bool:
-    workflow_name = "in"
-    while workflow_name not in ["A", "R"]:
-        workflow_name = workflows[workflow_name].process(part)
-    return workflow_name == "A"
-
-
-def rating(part: Part) -> int:
-    return sum(part.values())
+    return [part[attribute_name] for attribute_name in ATTRIBUTES]
+
+
+def compile_workflows(workflows: dict[str, Workflow]) -> Program:
+    # a workflow starts at its first instruction, workflows without instructions get one that is never true
+    first_node = {"A": ACCEPTED, "R": REJECTED}
+    n_nodes = 0
+    for name, workflow in workflows.items():
+        first_node[name] = n_nodes
+        n_nodes += max(len(workflow.instructions), 1)
+    compared_attribute = np.zeros(n_nodes, dtype=np.int64)
+    compared_to = np.zeros(n_nodes, dtype=np.int64)
+    is_less_than = np.zeros(n_nodes, dtype=np.bool_)
+    jump_true = np.zeros(n_nodes, dtype=np.int64)
+    jump_false = np.zeros(n_nodes, dtype=np.int64)
+    for name, workflow in workflows.items():
+        node = first_node[name]
+        for instruction in workflow.instructions:
+            compared_attribute[node] = ATTRIBUTES.index(instruction.compared_attribute)
+            compared_to[node] = instruction.compared_to
+            is_less_than[node] = instruction.comparison == Comparison.LessThan
+            jump_true[node] = first_node[instruction.send_to]
+            # if the instruction does not match, go to the next one
+            jump_false[node] = node + 1
+            node += 1
+        if len(workflow.instructions) == 0:
+            # x < 0 is never true
+            is_less_than[node] = True
+            node += 1
+        jump_false[node - 1] = first_node[workflow.else_send_to]
+    return Program(compared_attribute, compared_to, is_less_than, jump_true, jump_false, first_node["in"])
+
+
+def find_accepted(parts: npt.NDArray[np.int64], program: Program) -> npt.NDArray[np.bool_]:
+    """Moves all parts through the program at once, one instruction per part and step."""
+
+    nodes = np.full(len(parts), program.start, dtype=np.int64)
+    running = np.flatnonzero(nodes >= 0)
+    while len(running) > 0:
+        running_nodes = nodes[running]
+        values = parts[running, program.compared_attribute[running_nodes]]
+        compared_to = program.compared_to[running_nodes]
+        matches = np.where(program.is_less_than[running_nodes], values < compared_to, values > compared_to)
+        nodes[running] = np.where(matches, program.jump_true[running_nodes], program.jump_false[running_nodes])
+        running = running[nodes[running] >= 0]
+    return nodes == ACCEPTED
 
 
 def solution(input_file: str):
@@ -79,9 +120,10 @@ def solution(input_file: str):
     workflow_lines = workflows_text.splitlines()
     part_lines = parts_text.splitlines()
     workflows = {name: workflow for name, workflow in map(parse_workflow, workflow_lines)}
-    parts = list(map(parse_part, part_lines))
-    accepted_parts = list(filter(lambda part: is_accepted(part, workflows), parts))
-    return sum(map(rating, accepted_parts))
+    parts = np.array(list(map(parse_part, part_lines)), dtype=np.int64).reshape(-1, len(ATTRIBUTES))
+    program = compile_workflows(workflows)
+    is_accepted = find_accepted(parts, program)
+    return int(parts[is_accepted].sum())
 
 
 def main():
@@ -1,22 +1,20 @@
+import itertools
+import math
 import numpy as np
+import numpy.typing as npt
 from enum import Enum
 from dataclasses import dataclass
 
 
-@dataclass
-class Interval:
-    start: int
-    end: int
-
-    def __post_init__(self):
-        self.length = self.end - self.start + 1
-
-    def __repr__(self) -> str:
-        return f"{self.start} - {self.end}"
-
-
-PartSpace = dict[str, Interval]
-INITIAL_PART_SPACE = {attribute_name: Interval(1, 4000) for attribute_name in ["x", "m", "a", "s"]}
+ATTRIBUTES = ["x", "m", "a", "s"]
+# jump targets that end the program
+ACCEPTED = -1
+REJECTED = -2
+# part spaces are inclusive (start, end) ranges per attribute, shape (4, 2)
+PartSpace = npt.NDArray[np.int64]
+INITIAL_PART_SPACE = np.array([[1, 4000]] * len(ATTRIBUTES), dtype=np.int64)
+# how many comparisons contains makes at once
+MAX_CHUNK_SIZE = 1 << 22
 
 
 class Comparison(Enum):
@@ -31,46 +29,23 @@ class Instruction:
     compared_to: int
     send_to: str
 
-    def split(self, part_space: PartSpace) -> tuple[PartSpace, PartSpace]:
-        """Returns (condition true, condition false) part spaces."""
-
-        compared_interval = part_space[self.compared_attribute]
-        if self.comparison == Comparison.LessThan:
-            if compared_interval.end < self.compared_to:
-                return part_space, None
-            if self.compared_to < compared_interval.start:
-                return None, part_space
-            interval_true = Interval(compared_interval.start, self.compared_to - 1)
-            interval_false = Interval(self.compared_to, compared_interval.end)
-        else:
-            if compared_interval.start > self.compared_to:
-                return part_space, None
-            if self.compared_to > compared_interval.end:
-                return None, part_space
-            interval_true = Interval(self.compared_to + 1, compared_interval.end)
-            interval_false = Interval(compared_interval.start, self.compared_to)
-        part_space_true = part_space.copy()
-        part_space_false = part_space.copy()
-        part_space_true[self.compared_attribute] = interval_true
-        part_space_false[self.compared_attribute] = interval_false
-        return part_space_true, part_space_false
-
 
 @dataclass
 class Workflow:
     instructions: list[Instruction]
     else_send_to: str
 
-    def process(self, part_space: PartSpace) -> list[str, PartSpace]:
-        split_part_spaces = []
-        for instruction in self.instructions:
-            part_space_sent, part_space = instruction.split(part_space)
-            if part_space_sent is not None:
-                split_part_spaces.append((instruction.send_to, part_space_sent))
-            if part_space is None:
-                return split_part_spaces
-        split_part_spaces.append((self.else_send_to, part_space))
-        return split_part_spaces
+
+@dataclass
+class Program:
+    """Every instruction is a node, the else of a workflow is the false jump of its last instruction."""
+
+    compared_attribute: npt.NDArray[np.int64]
+    compared_to: npt.NDArray[np.int64]
+    is_less_than: npt.NDArray[np.bool_]
+    jump_true: npt.NDArray[np.int64]
+    jump_false: npt.NDArray[np.int64]
+    start: int
 
 
 def parse_instruction(instruction: str) -> Instruction:
@@ -92,33 +67,139 @@ def parse_workflow(workflow: str) -> tuple[str, Workflow]:
     return name, Workflow(instructions, else_send_to)
 
 
-def _compute_n_accepted_parts(input_space: PartSpace, workflow_name: str, workflows: dict[str, Workflow]) -> int:
-    if workflow_name == "A":
-        return n_combinations_in(input_space)
-    elif workflow_name == "R":
-        return 0
-    split_part_spaces = workflows[workflow_name].process(input_space)
-    return sum([_compute_n_accepted_parts(part_space, send_to, workflows) for send_to, part_space in split_part_spaces])
-
-
-def n_combinations_in(part_space: PartSpace) -> int:
-    return int(np.prod([interval.length for interval in part_space.values()], dtype=np.uint64))
-
-
-def compute_n_accepted_parts(workflows: dict[str, Workflow]) -> int:
-    return _compute_n_accepted_parts(INITIAL_PART_SPACE, "in", workflows)
-
-
-def solution(input_file: str):
+def parse_part(part_str: str) -> list[int]:
+    assignment_strings = part_str[1:-1].split(",")
+    part = {}
+    for assignment_string in assignment_strings:
+        attribute_name, attribute_value_str = assignment_string.split("=")
+        part[attribute_name] = int(attribute_value_str)
+    return [part[attribute_name] for attribute_name in ATTRIBUTES]
+
+
+def compile_workflows(workflows: dict[str, Workflow]) -> Program:
+    # a workflow starts at its first instruction, workflows without instructions get one that is never true
+    first_node = {"A": ACCEPTED, "R": REJECTED}
+    n_nodes = 0
+    for name, workflow in workflows.items():
+        first_node[name] = n_nodes
+        n_nodes += max(len(workflow.instructions), 1)
+    compared_attribute = np.zeros(n_nodes, dtype=np.int64)
+    compared_to = np.zeros(n_nodes, dtype=np.int64)
+    is_less_than = np.zeros(n_nodes, dtype=np.bool_)
+    jump_true = np.zeros(n_nodes, dtype=np.int64)
+    jump_false = np.zeros(n_nodes, dtype=np.int64)
+    for name, workflow in workflows.items():
+        node = first_node[name]
+        for instruction in workflow.instructions:
+            compared_attribute[node] = ATTRIBUTES.index(instruction.compared_attribute)
+            compared_to[node] = instruction.compared_to
+            is_less_than[node] = instruction.comparison == Comparison.LessThan
+            jump_true[node] = first_node[instruction.send_to]
+            # if the instruction does not match, go to the next one
+            jump_false[node] = node + 1
+            node += 1
+        if len(workflow.instructions) == 0:
+            # x < 0 is never true
+            is_less_than[node] = True
+            node += 1
+        jump_false[node - 1] = first_node[workflow.else_send_to]
+    return Program(compared_attribute, compared_to, is_less_than, jump_true, jump_false, first_node["in"])
+
+
+def split(part_space: PartSpace, program: Program, node: int) -> tuple[PartSpace | None, PartSpace | None]:
+    """Returns (condition true, condition false) part spaces, None if they are empty."""
+
+    attribute = program.compared_attribute[node]
+    compared_to = program.compared_to[node]
+    start, end = part_space[attribute]
+    if program.is_less_than[node]:
+        interval_true = (start, min(end, compared_to - 1))
+        interval_false = (max(start, compared_to), end)
+    else:
+        interval_true = (max(start, compared_to + 1), end)
+        interval_false = (start, min(end, compared_to))
+    split_part_spaces = []
+    for interval in [interval_true, interval_false]:
+        if interval[0] > interval[1]:
+            split_part_spaces.append(None)
+            continue
+        split_part_space = part_space.copy()
+        split_part_space[attribute] = interval
+        split_part_spaces.append(split_part_space)
+    return tuple(split_part_spaces)
+
+
+def find_accepted_part_spaces(program: Program) -> npt.NDArray[np.int64]:
+    """Disjoint part spaces that together hold all accepted parts, shape (n_part_spaces, 4, 2)."""
+
+    accepted_part_spaces = []
+    work_list = [(program.start, INITIAL_PART_SPACE)]
+    while len(work_list) > 0:
+        node, part_space = work_list.pop()
+        if node == ACCEPTED:
+            accepted_part_spaces.append(part_space)
+            continue
+        if node == REJECTED:
+            continue
+        part_space_true, part_space_false = split(part_space, program, node)
+        if part_space_true is not None:
+            work_list.append((program.jump_true[node], part_space_true))
+        if part_space_false is not None:
+            work_list.append((program.jump_false[node], part_space_false))
+    return np.array(accepted_part_spaces, dtype=np.int64).reshape(-1, len(ATTRIBUTES), 2)
+
+
+def n_combinations_in(part_spaces: npt.NDArray[np.int64], bounds: PartSpace = INITIAL_PART_SPACE) -> int:
+    """Number of parts in the part spaces that are also within the bounds."""
+
+    starts = np.maximum(part_spaces[:, :, 0], bounds[:, 0])
+    ends = np.minimum(part_spaces[:, :, 1], bounds[:, 1])
+    lengths = np.maximum(ends - starts + 1, 0)
+    # python ints, the products can get too big for 64 bits
+    return sum(math.prod(part_space_lengths) for part_space_lengths in lengths.tolist())
+
+
+def contains(part_spaces: npt.NDArray[np.int64], parts: npt.NDArray[np.int64]) -> npt.NDArray[np.bool_]:
+    """For every part in the (n_parts, 4) array, whether it is in any of the part spaces. Compares chunks of parts, so memory stays bounded."""
+
+    n_parts_per_chunk = max(MAX_CHUNK_SIZE // (max(len(part_spaces), 1) * len(ATTRIBUTES)), 1)
+    is_contained = np.zeros(len(parts), dtype=np.bool_)
+    for chunk_start in range(0, len(parts), n_parts_per_chunk):
+        chunk = parts[chunk_start:chunk_start + n_parts_per_chunk]
+        is_inside = (part_spaces[None, :, :, 0] <= chunk[:, None, :]) & (chunk[:, None, :] <= part_spaces[None, :, :, 1])
+        is_contained[chunk_start:chunk_start + n_parts_per_chunk] = np.any(np.all(is_inside, axis=2), axis=1)
+    return is_contained
+
+
+def read_input(input_file: str) -> tuple[Program, npt.NDArray[np.int64]]:
     with open(input_file, 'r') as f:
         text = f.read()
-    workflows_text, _ = text.split("\n\n")
+    workflows_text, parts_text = text.split("\n\n")
     workflow_lines = workflows_text.splitlines()
+    part_lines = parts_text.splitlines()
     workflows = {name: workflow for name, workflow in map(parse_workflow, workflow_lines)}
-    return compute_n_accepted_parts(workflows)
+    parts = np.array(list(map(parse_part, part_lines)), dtype=np.int64).reshape(-1, len(ATTRIBUTES))
+    return compile_workflows(workflows), parts
+
+
+def solution(input_file: str):
+    program, _ = read_input(input_file)
+    return n_combinations_in(find_accepted_part_spaces(program))
 
 
 def main():
+    program, parts = read_input("test_input.txt")
+    part_spaces = find_accepted_part_spaces(program)
+    # the ratings of the accepted parts from part 1
+    assert parts[contains(part_spaces, parts)].sum() == 19114
+    # splitting the bounds in half at x doesn't lose any parts
+    lower_half, upper_half = INITIAL_PART_SPACE.copy(), INITIAL_PART_SPACE.copy()
+    lower_half[0, 1], upper_half[0, 0] = 2000, 2001
+    assert n_combinations_in(part_spaces, lower_half) + n_combinations_in(part_spaces, upper_half) == 167409079868000
+    # counting in small bounds is the same as checking every part in them
+    small_bounds = np.array([[1400, 1420], [1790, 1810], [2000, 2010], [530, 545]], dtype=np.int64)
+    small_parts = np.array(list(itertools.product(*(range(start, end + 1) for start, end in small_bounds))), dtype=np.int64)
+    assert n_combinations_in(part_spaces, small_bounds) == np.count_nonzero(contains(part_spaces, small_parts))
     assert solution("test_input.txt") == 167409079868000
     answer = solution("input.txt")
     print(f"<flavor text>: {answer}")